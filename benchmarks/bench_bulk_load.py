@@ -0,0 +1,97 @@
+"""
+SQLite write cost and final file size of a full build with per-step commits
+and indexes created up front, versus the bulk-load mode of build_db_tables,
+with and without VACUUM, and of an incremental update with and without
+VACUUM. Every build runs all the stages of build_db_tables, down to the
+snapshot export. API responses are recorded from the local stub once
+and replayed, so every build writes identical rows and network time is out
+of the picture.
+
+    python -m benchmarks.bench_bulk_load --players 700
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+import src.data_extraction.db_handler as dbh
+import src.data_extraction.fpl_api_handler as fpl
+from benchmarks.common import measure
+from benchmarks.stub_api import running_stub
+
+
+def build_per_step_commits(db_name):
+    """
+    The stages of build_db_tables, with every step committing on its own and
+    the indexes kept up to date through the inserts
+    """
+    db = dbh.DBHandler(db_name)
+    db.create_default_tables()
+    db.create_indexes()
+    db.static_inserts()
+    db.create_events()
+    db.create_fixtures()
+    db.create_player_static()
+    db.create_player_gw_detailed()
+    db.create_views()
+    db.create_player_window_metrics()
+    db.create_player_leaderboards()
+    db.export_snapshot()
+    db.conn.close()
+
+
+def build_bulk_load(db_name, vacuum=False):
+    dbh.build_db_tables(db_name, vacuum=vacuum)
+
+
+def update(db_name, vacuum=False):
+    dbh.build_db_tables(db_name, incremental=True, vacuum=vacuum)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, default=700)
+    parser.add_argument("--rounds", type=int, default=38)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(dir=os.path.dirname(__file__))
+    cache_dir = os.path.join(workdir, "api_cache")
+    db_name = os.path.join(workdir, "FPL_DB.db")
+
+    with running_stub(players=args.players, rounds=args.rounds, latency=0) as url:
+        fpl.BASE_URL = url
+        fpl.configure_cache(cache_dir)
+        build_bulk_load(db_name)
+    fpl.configure_cache(cache_dir, replay=True)
+
+    builds = {
+        "per-step commits": lambda: build_per_step_commits(db_name),
+        "bulk load": lambda: build_bulk_load(db_name),
+        "bulk load + VACUUM": lambda: build_bulk_load(db_name, vacuum=True),
+    }
+    results = {}
+    for name, build in builds.items():
+        if os.path.exists(db_name):
+            os.remove(db_name)
+        _, wall, _ = measure(build)
+        results[name] = (wall, os.path.getsize(db_name))
+    fpl.configure_cache(None)
+
+    # A matchday update, which refreshes the players of the newly played
+    # fixture and rewrites their derived rows, leaving the old pages free
+    stub_options = dict(players=args.players, rounds=args.rounds, latency=0)
+    for name, vacuum in [("update", False), ("update + VACUUM", True)]:
+        os.remove(db_name)
+        with running_stub(played_fixtures=4, **stub_options):
+            build_bulk_load(db_name)
+        with running_stub(played_fixtures=5, **stub_options):
+            _, wall, _ = measure(lambda: update(db_name, vacuum))
+        results[name] = (wall, os.path.getsize(db_name))
+
+    for name, (wall, size) in results.items():
+        print(f"{name:>18}: {wall:.2f}s wall, {size / 2**20:.2f} MB on disk")
+    shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
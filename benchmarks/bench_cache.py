@@ -0,0 +1,61 @@
+"""
+Full database builds through the on-disk response cache: a cold build that
+fills it, a warm build revalidated with conditional requests, and an offline
+replay with the stub API shut down.
+
+    python -m benchmarks.bench_cache --players 700
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+import src.data_extraction.db_handler as dbh
+import src.data_extraction.fpl_api_handler as fpl
+from benchmarks.common import measure
+from benchmarks.stub_api import running_stub, stub_stats
+
+
+def build(db_name):
+    _, wall, _ = measure(dbh.build_db_tables, db_name)
+    return wall
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, default=700)
+    parser.add_argument("--latency", type=float, default=0.03)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    db_name = os.path.join(workdir, "FPL_DB.db")
+    cache_dir = os.path.join(workdir, "api_cache")
+    results = {}
+
+    with running_stub(players=args.players, latency=args.latency) as base_url:
+        fpl.BASE_URL = base_url
+        fpl.configure_cache(cache_dir)
+        results["cold"] = (build(db_name), stub_stats(base_url))
+        before = stub_stats(base_url)
+        wall = build(db_name)
+        after = stub_stats(base_url)
+        results["revalidated"] = (
+            wall,
+            {key: after[key] - before[key] for key in after},
+        )
+
+    fpl.configure_cache(cache_dir, replay=True)
+    results["replay"] = (build(db_name), {"requests": 0, "not_modified": 0, "bytes": 0})
+    fpl.configure_cache(None)
+
+    for mode, (wall, stats) in results.items():
+        print(
+            f"{mode:>11}: {wall:.2f}s wall, {stats['requests']} requests "
+            f"({stats['not_modified']} not modified), "
+            f"{stats['bytes'] / 2**20:.1f} MB downloaded"
+        )
+    shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Latency of a mix of dashboard callback requests, mostly for the default views,
+with the callback cache off and on. Then empties the in-process tier to
+stand in for another gunicorn worker, and replays the mix from the disk tier.
+
+    python -m benchmarks.bench_callback_cache --requests 200
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+
+def requests_mix(rng, n, default_share):
+    """
+    Callback request bodies, default_share of them for the default inputs of
+    each page and the rest for random other inputs
+    """
+    metrics = ["event_points", "total_points", "form", "bps", "ict_index"]
+    gw_metrics = ["form", "cumulative_points", "average_xgi", "average_bps"]
+    positions = [None, "GKP", "DEF", "MID", "FWD"]
+    bodies = []
+    for _ in range(n):
+        default = rng.random() < default_share
+        kind = rng.choice(["home", "gw", "scatter"])
+        if kind == "home":
+            value = "event_points" if default else rng.choice(metrics)
+            outputs = {"id": "top-performers-graph", "property": "figure"}
+            inputs = [
+                {"id": "top-performers-dropdown", "property": "value", "value": value}
+            ]
+        elif kind == "gw":
+            metric = "form" if default else rng.choice(gw_metrics)
+            position = None if default else rng.choice(positions)
+            outputs = {"id": "player_gw_graph", "property": "figure"}
+            inputs = [
+                {"id": "metric_dropdown", "property": "value", "value": metric},
+                {"id": "team_dropdown", "property": "value", "value": None},
+                {"id": "position_dropdown", "property": "value", "value": position},
+                {"id": "player_dropdown", "property": "value", "value": None},
+            ]
+        else:
+            position = None if default else rng.choice(positions)
+            outputs = {"id": "scatter", "property": "figure"}
+            inputs = [
+                {
+                    "id": "x_axis",
+                    "property": "value",
+                    "value": "expected_goal_involvements",
+                },
+                {"id": "y_axis", "property": "value", "value": "goal_involvements"},
+                {"id": "bubble_size", "property": "value", "value": "form"},
+                {"id": "position_dropdown", "property": "value", "value": position},
+                {"id": "team_dropdown", "property": "value", "value": []},
+                {
+                    "id": "minutes_played_slider",
+                    "property": "value",
+                    "value": [0, 5000],
+                },
+                {"id": "price_range_slider", "property": "value", "value": [0, 20]},
+            ]
+        bodies.append(
+            json.dumps(
+                {
+                    "output": f"{outputs['id']}.{outputs['property']}",
+                    "outputs": outputs,
+                    "inputs": inputs,
+                    "changedPropIds": [f"{inputs[0]['id']}.value"],
+                }
+            )
+        )
+    return bodies
+
+
+def run(client, bodies):
+    start = time.perf_counter()
+    for body in bodies:
+        response = client.post(
+            "/_dash-update-component", data=body, content_type="application/json"
+        )
+        assert response.status_code == 200, response.status_code
+    return (time.perf_counter() - start) / len(bodies)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--default-share", type=float, default=0.8)
+    args = parser.parse_args()
+
+    # The app resolves its pages and assets relative to src
+    os.chdir("src")
+    sys.path.insert(0, os.getcwd())
+    import app
+    from src.utils.callback_cache import cache
+
+    client = app.server.test_client()
+    bodies = requests_mix(random.Random(0), args.requests, args.default_share)
+
+    cache.enabled = False
+    uncached = run(client, bodies)
+    print(f"Cache off: {uncached * 1000:.1f} ms per request")
+
+    cache.enabled = True
+    cache.disk_dir = tempfile.mkdtemp()
+    cached = run(client, bodies)
+    print(f"Cache on: {cached * 1000:.1f} ms per request, {cache.stats()}")
+
+    # A worker that has not served these inputs yet, but shares the disk tier
+    cache.entries.clear()
+    from_disk = run(client, bodies)
+    print(
+        f"Fresh worker, disk tier: {from_disk * 1000:.1f} ms per request, {cache.stats()}"
+    )
+    shutil.rmtree(cache.disk_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Cost of the Home page callbacks opening a connection and querying SQLite on
+every call versus reading the process-wide DataStore. Also reports the cost of
+the per-call staleness check and of a reload after the database changes. Runs
+on a copy of the given database.
+
+    python -m benchmarks.bench_data_store --db data/FPL_DB.db
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+
+import src.data_extraction.db_handler as dbh
+from benchmarks.common import median_time
+from src.utils.data_store import DataStore
+
+TOP_PLAYERS_QUERY = """
+    SELECT id, web_name, position, team_name, total_points
+    FROM  (
+        SELECT
+            id, web_name, position, team_name, total_points,
+            rank() OVER (PARTITION BY position ORDER BY total_points DESC) AS rank
+        FROM
+            player_tabular_view
+        )
+    WHERE
+        rank <= 5
+    ORDER BY
+        rank
+"""
+
+
+def callbacks_from_sqlite(db_name):
+    # What the Home callbacks did before the store: a connection per callback
+    db = dbh.DBHandler(db_name)
+    pd.read_sql_query("SELECT * FROM current_gw_view", db.conn)
+    db.conn.close()
+    db = dbh.DBHandler(db_name)
+    top = pd.read_sql_query(TOP_PLAYERS_QUERY, db.conn)
+    db.conn.close()
+    return top
+
+
+def callbacks_from_store(store):
+    data = store.get()
+    return data["current_gw"], data["player_leaderboards"]["total_points"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default=os.path.join("data", "FPL_DB.db"))
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    db_name = os.path.join(workdir, "FPL_DB.db")
+    shutil.copy(args.db, db_name)
+    store = DataStore(db_name)
+    store.get()
+
+    sqlite = median_time(lambda: callbacks_from_sqlite(db_name), args.repeat)
+    from_store = median_time(lambda: callbacks_from_store(store), args.repeat)
+    check = median_time(store.get, args.repeat)
+    print(
+        f"Home callbacks: SQLite {sqlite * 1000:.2f} ms, "
+        f"store {from_store * 1000:.2f} ms "
+        f"(of which {check * 1000:.3f} ms checking the file)"
+    )
+
+    os.utime(db_name)
+    store.get()
+    print(f"Reloads after touching the file: {store.reloads - 1}")
+
+    db = dbh.DBHandler(db_name)
+    with db.conn:
+        db.conn.execute("UPDATE events_static SET is_current = 0")
+        db.conn.execute("UPDATE events_static SET is_current = 1 WHERE id = 1")
+    db.conn.close()
+    reload = median_time(store.get, 1)
+    print(
+        f"Reloads after changing the file: {store.reloads - 1}, "
+        f"current gameweek {store.get()['current_gw']}, took {reload * 1000:.0f} ms"
+    )
+    shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Wall time and peak RSS of fetching every player's element-summary through the
+old multiprocessing.Pool(8) + bare requests.get path versus iter_players_info,
+the async fetch engine the build streams histories through, against the local
+stub API.
+
+    python -m benchmarks.bench_fetch --players 700 --latency 0.03
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from multiprocessing import Pool
+
+import requests
+
+from benchmarks.common import measure
+from benchmarks.stub_api import running_stub
+
+
+def get_player_history(element_id):
+    # The pre-async fetch path: no session, no timeout, no retry
+    url = f"{os.environ['FPL_API_URL']}/element-summary/{element_id}/"
+    return requests.get(url).json()["history"]
+
+
+def fetch_pool(players):
+    with Pool(8) as p:
+        return list(p.imap(get_player_history, players))
+
+
+def fetch_async(players, concurrency):
+    import src.data_extraction.fpl_api_handler as fpl
+
+    return [
+        history
+        for _, history, _ in fpl.iter_players_info(
+            players, "history", concurrency=concurrency, progress=False
+        )
+    ]
+
+
+def run_child(args):
+    players = list(range(1, args.players + 1))
+    if args.mode == "pool":
+        history, wall, peak_rss = measure(fetch_pool, players)
+    else:
+        history, wall, peak_rss = measure(fetch_async, players, args.concurrency)
+    rows = sum(len(player) for player in history)
+    print(
+        json.dumps(
+            {"mode": args.mode, "wall_s": wall, "peak_rss_mb": peak_rss, "rows": rows}
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, default=700)
+    parser.add_argument("--latency", type=float, default=0.03)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mode", choices=["pool", "async"])
+    args = parser.parse_args()
+
+    if args.mode:
+        run_child(args)
+        return
+
+    with running_stub(players=args.players, latency=args.latency) as base_url:
+        env = dict(os.environ, FPL_API_URL=base_url)
+        for mode in ["pool", "async"]:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_fetch", f"--mode={mode}"]
+                + [f"--players={args.players}", f"--concurrency={args.concurrency}"],
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            result = json.loads(output.splitlines()[-1])
+            print(
+                f"{mode:>6}: {result['wall_s']:.2f}s wall, "
+                f"{result['peak_rss_mb']:.0f} MB peak RSS, {result['rows']} rows"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Cost of the Player Overall Statistics filters on the players table and on a
+synthetic one `--scale` times its size: copying the frame and masking it
+column by column, as filter_df used to, against a FilterIndex selection, cold
+and cached. Also checks that both select the same rows for random filters.
+
+    python -m benchmarks.bench_filter_index --scale 100
+"""
+import argparse
+import random
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import median_time
+from src.utils.data_store import DataStore
+from src.utils.filter_index import FilterIndex
+
+
+def copy_and_mask(df, position, teams, minutes, price):
+    # What filter_df did before the index
+    dff = df.copy()
+    if position != None:
+        dff = dff[dff.position == position]
+    if teams != [] and teams != None:
+        dff = dff[dff.team_name.isin(teams)]
+    dff = dff[(dff.minutes >= minutes[0]) & (dff.minutes <= minutes[1])]
+    dff = dff[(dff.now_cost >= price[0]) & (dff.now_cost <= price[1])]
+    return dff
+
+
+def random_filters(df, rng):
+    minutes = sorted(rng.sample(range(int(df.minutes.max()) + 1), 2))
+    price = sorted(rng.choice(df.now_cost.unique().tolist()) for _ in range(2))
+    position = rng.choice([None] + df.position.unique().tolist())
+    teams = rng.sample(df.team_name.unique().tolist(), rng.randint(0, 3))
+    return position, teams, minutes, price
+
+
+def check_parity(df, index, rng, n=200):
+    for _ in range(n):
+        filters = random_filters(df, rng)
+        expected = copy_and_mask(df, *filters).index.to_numpy()
+        actual = df.index.to_numpy()[index.select(*filters)]
+        assert np.array_equal(expected, actual), filters
+
+
+def benchmark(df, label, rng, repeat):
+    filters = ("MID", ["ARS", "LIV"], [90, 2000], [5.0, 10.0])
+    old = median_time(lambda: copy_and_mask(df, *filters), repeat)
+    build = median_time(lambda: FilterIndex(df), repeat)
+    index = FilterIndex(df)
+    check_parity(df, index, rng)
+
+    def cold():
+        index.cache.clear()
+        return index.select(*filters)
+
+    cold_time = median_time(cold, repeat)
+    cached = median_time(lambda: index.select(*filters), repeat)
+    print(
+        f"{label} ({len(df)} rows): copy and mask {old * 1000:.3f} ms, "
+        f"index build {build * 1000:.3f} ms, select {cold_time * 1000:.3f} ms, "
+        f"cached select {cached * 1000:.4f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    df = DataStore().get()["player_table"]
+    benchmark(df, "Players table", rng, args.repeat)
+    scaled = pd.concat([df] * args.scale, ignore_index=True)
+    benchmark(scaled, f"{args.scale}x players table", rng, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+HTTP requests, bytes and wall time of a matchday refresh done as a full
+rebuild versus build_db_tables(incremental=True), against the local stub API.
+The refreshed databases are compared table by table to check they match.
+Since the previous run, one fixture has finished, one upcoming fixture has been
+postponed without a new date and one player has left the game.
+
+    python -m benchmarks.bench_incremental --players 700 --round 20
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+
+import src.data_extraction.db_handler as dbh
+import src.data_extraction.fpl_api_handler as fpl
+from benchmarks.common import measure
+from benchmarks.stub_api import running_stub, stub_stats
+
+TABLES = [
+    "players_static",
+    "events_static",
+    "fixtures",
+    "player_gw_detailed",
+    "player_window_metrics",
+]
+
+
+def build(base_url, db_name, incremental=False):
+    fpl.BASE_URL = base_url
+    before = stub_stats(base_url)
+    _, wall, _ = measure(dbh.build_db_tables, db_name, incremental)
+    after = stub_stats(base_url)
+    return {
+        "wall_s": wall,
+        "requests": after["requests"] - before["requests"],
+        "bytes": after["bytes"] - before["bytes"],
+    }
+
+
+def table_rows(db_name, table):
+    conn = sqlite3.connect(db_name)
+    rows = sorted(conn.execute(f"SELECT * FROM {table}").fetchall(), key=repr)
+    conn.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, default=700)
+    parser.add_argument("--round", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.03)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    full_db = os.path.join(workdir, "full.db")
+    incremental_db = os.path.join(workdir, "incremental.db")
+    stub_options = dict(current_round=args.round, latency=args.latency)
+
+    # State after the previous hourly run: 4 fixtures of the round played
+    with running_stub(
+        players=args.players, played_fixtures=4, **stub_options
+    ) as base_url:
+        build(base_url, incremental_db)
+
+    # One more fixture finished since then, one was postponed and one player
+    # left
+    with running_stub(
+        players=args.players - 1,
+        played_fixtures=5,
+        postponed_fixtures=1,
+        **stub_options,
+    ) as base_url:
+        results = {
+            "full": build(base_url, full_db),
+            "incremental": build(base_url, incremental_db, incremental=True),
+        }
+
+    for mode, result in results.items():
+        print(
+            f"{mode:>11}: {result['wall_s']:.2f}s wall, {result['requests']} requests, "
+            f"{result['bytes'] / 2**20:.1f} MB downloaded"
+        )
+    for table in TABLES:
+        assert table_rows(full_db, table) == table_rows(
+            incremental_db, table
+        ), f"{table} differs between full and incremental refresh"
+    print("Full and incremental databases match")
+    shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Overhead of the /metrics instrumentation on callback requests. Replays the
+callback mix of bench_callback_cache, with the callback cache on so that most
+requests are cheap and the overhead shows, in one fresh app with metrics
+disabled and one with them enabled, where the metrics' request hooks are
+also timed on their own. Then times a scrape of /metrics.
+
+    python -m benchmarks.bench_metrics --requests 500 --repeat 5
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+from benchmarks.bench_callback_cache import requests_mix, run
+from benchmarks.common import call_times
+from src.utils import metrics as metrics_module
+
+
+def time_hooks(server):
+    """
+    Wraps the request hooks of the metrics so that their time adds up in the
+    returned one-item list, which the noise of whole requests would hide
+    """
+    total = [0.0]
+
+    def timed(fn):
+        def wrapper(*args):
+            start = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                total[0] += time.perf_counter() - start
+
+        return wrapper
+
+    for hooks in [server.before_request_funcs, server.after_request_funcs]:
+        hooks[None] = [
+            timed(fn) if fn.__module__ == metrics_module.__name__ else fn
+            for fn in hooks[None]
+        ]
+    return total
+
+
+def child(enabled, n, repeat):
+    os.chdir("src")
+    sys.path.insert(0, os.getcwd())
+    from src.utils.app_config import config
+
+    config.metrics_enabled = enabled
+    import app
+
+    hook_seconds = time_hooks(app.server) if enabled else [0.0]
+    client = app.server.test_client()
+    bodies = requests_mix(random.Random(0), n, 0.8)
+    run(client, bodies)
+    hook_seconds[0] = 0.0
+    report = {"request": min(run(client, bodies) for _ in range(repeat))}
+    if enabled:
+        report["hooks"] = hook_seconds[0] / (len(bodies) * repeat)
+        report["scrape"] = min(call_times(lambda: client.get("/metrics"), repeat))
+        report["lines"] = len(client.get("/metrics").get_data().splitlines())
+    print(json.dumps(report))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--child", choices=["on", "off"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child == "on", args.requests, args.repeat)
+
+    reports = {}
+    for setting in ["off", "on"]:
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_metrics", "--child", setting]
+            + ["--requests", str(args.requests), "--repeat", str(args.repeat)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        reports[setting] = json.loads(result.stdout.splitlines()[-1])
+
+    off, on = reports["off"]["request"], reports["on"]["request"]
+    print(f"Metrics disabled: {off * 1e6:.0f} us per request")
+    print(
+        f"Metrics enabled: {on * 1e6:.0f} us per request, "
+        f"{(on - off) * 1e6:+.0f} us ({(on / off - 1) * 100:+.1f}%)"
+    )
+    print(
+        f"Metrics hooks: {reports['on']['hooks'] * 1e6:.0f} us per request, timed "
+        "on their own"
+    )
+    print(
+        f"Scrape of /metrics: {reports['on']['scrape'] * 1000:.2f} ms for "
+        f"{reports['on']['lines']} lines"
+    )
+
+
+if __name__ == "__main__":
+    main()
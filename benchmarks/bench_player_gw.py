@@ -0,0 +1,104 @@
+"""
+Cost of the Player GW Statistics graph callback: filtering every row of
+player_window_metrics and drawing with plotly express, followed by a name
+lookup per trace over the whole frame, as the page used to, against selecting
+players from the PlayerSeries and drawing their slices. Also checks that both
+pick the same players, and reports the cost of grouping the series at load.
+
+    python -m benchmarks.bench_player_gw
+"""
+import argparse
+
+import plotly.express as px
+
+from benchmarks.common import median_time
+from src.data_extraction.db_handler import load_config
+from src.utils import figures
+from src.utils.data_store import DataStore
+from src.utils.player_series import PlayerSeries
+
+SCENARIOS = {
+    "top 10 by form": ("form", None, None, None),
+    "top 10 MID by cumulative points": ("cumulative_points", None, "MID", None),
+    "two teams by xGI average": ("average_xgi", ["ARS", "LIV"], None, None),
+    "three named players": ("total_points", None, None, ["Salah", "Haaland", "Palmer"]),
+}
+
+
+def filtered_players(df, metric, team, position, player):
+    # The selection update_player_gw_graph made before the series
+    if position is None or position == []:
+        position = df["position"].unique()
+    else:
+        position = [position]
+    if team is None or team == []:
+        team = df["team_name"].unique()
+    if player is None or player == []:
+        df1 = df[(df["position"].isin(position)) & (df["team_name"].isin(team))]
+        df1 = df1.sort_values(by=["round", metric], ascending=False)
+        player = df1["id"].unique()[:10]
+    else:
+        player = df[df.web_name.isin(player)]["id"].unique()
+    return df[
+        (df["id"].isin(player))
+        & (df["position"].isin(position))
+        & (df["team_name"].isin(team))
+    ]
+
+
+def frame_figure(df, labels, metric, team, position, player):
+    players = filtered_players(df, metric, team, position, player)
+    fig = px.line(
+        players,
+        x="round",
+        y=metric,
+        color="id",
+        markers=True,
+        labels=labels,
+        hover_data=["web_name", "team_name", "position"],
+    )
+    fig.for_each_trace(
+        lambda t: t.update(name=df.loc[df.id.astype(str) == t.name, "web_name"].iloc[0])
+    )
+    return fig
+
+
+def series_slots(series, metric, team, position, player):
+    mask = series.mask([position] if position else None, team)
+    if player is None or player == []:
+        return series.top(metric, mask)
+    return series.named(player, mask)
+
+
+def series_figure(series, labels, metric, team, position, player):
+    slots = series_slots(series, metric, team, position, player)
+    return figures.player_lines(series, slots, metric, labels=labels)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    labels = load_config()["gw_column_names"] | {"round": "Gameweek"}
+    data = DataStore().get()
+    series = data["player_series"]
+    df = series.df
+    grouping = median_time(lambda: PlayerSeries(df), args.repeat)
+    print(f"Grouping {len(df)} rows by player: {grouping * 1000:.1f} ms")
+
+    for label, scenario in SCENARIOS.items():
+        # Ties in the latest round may be broken differently, so compare sets
+        expected = set(filtered_players(df, *scenario)["id"])
+        actual = {series.ids[slot] for slot in series_slots(series, *scenario)}
+        assert expected == actual, (label, expected ^ actual)
+
+        before = median_time(lambda: frame_figure(df, labels, *scenario), args.repeat)
+        after = median_time(
+            lambda: series_figure(series, labels, *scenario), args.repeat
+        )
+        print(f"{label}: frame {before * 1000:.1f} ms, series {after * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Payload size and latency of the Player Overall Statistics table callback. The
+app serves one page of the visible columns, sorted with the store's presorted
+orders. This is compared with sending every filtered row with all of its
+columns, which the browser then paged and sorted itself. The paged timings
+include the whole Dash request, the all-rows ones only filtering and
+serializing the rows. The app is loaded with player_table_mode set to
+"server", whatever src/utils/config.yml says.
+
+    python -m benchmarks.bench_player_table
+"""
+import argparse
+import json
+import os
+import sys
+
+import plotly
+
+from benchmarks.common import median_time
+
+TABLE_OUTPUTS = ["data", "hidden_columns", "sort_by", "page_current", "page_count"]
+
+SCENARIOS = {
+    "all players": {},
+    "midfielders": {"position_dropdown": "MID"},
+    "sorted by form, page 3": {
+        "sort_by": [{"column_id": "form", "direction": "asc"}],
+        "page_current": 2,
+        "changed": "player_table.page_current",
+    },
+}
+
+
+def callback_body(df, scenario):
+    """
+    Dash request for update_player_table with the page's default inputs,
+    overridden by the scenario
+    """
+    values = {
+        "position_dropdown": None,
+        "team_dropdown": [],
+        "minutes_played_slider": [0, int(df.minutes.max())],
+        "price_range_slider": [float(df.now_cost.min()), float(df.now_cost.max())],
+        "scatter": None,
+        "x_axis": "expected_goal_involvements",
+        "y_axis": "goal_involvements",
+        "page_current": 0,
+        "sort_by": [],
+    }
+    values.update({k: v for k, v in scenario.items() if k != "changed"})
+    properties = {"scatter": "relayoutData", "x_axis": "value", "y_axis": "value"}
+    inputs = []
+    for key, value in values.items():
+        if key in ["page_current", "sort_by"]:
+            inputs.append({"id": "player_table", "property": key, "value": value})
+        else:
+            inputs.append(
+                {"id": key, "property": properties.get(key, "value"), "value": value}
+            )
+    return json.dumps(
+        {
+            "output": f"..{'...'.join(f'player_table.{o}' for o in TABLE_OUTPUTS)}..",
+            "outputs": [{"id": "player_table", "property": o} for o in TABLE_OUTPUTS],
+            "inputs": inputs,
+            "changedPropIds": [scenario.get("changed", "position_dropdown.value")],
+        }
+    )
+
+
+def all_rows_payload(player_tabular, scenario):
+    # What the callback sent before: every filtered row, sorted in the browser
+    df = player_tabular.filter_df(
+        scenario.get("position_dropdown"),
+        [],
+        [0, player_tabular.store.get()["player_table"].minutes.max()],
+        [-1e9, 1e9],
+    )
+    return json.dumps(df.to_dict("records"), cls=plotly.utils.PlotlyJSONEncoder)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    # The app resolves its pages and assets relative to src
+    os.chdir("src")
+    sys.path.insert(0, os.getcwd())
+    from src.utils.app_config import config
+
+    # Only the server mode has a table callback
+    config.player_table_mode = "server"
+    import app
+    from pages import player_tabular
+
+    client = app.server.test_client()
+    df = player_tabular.store.get()["player_table"]
+    for label, scenario in SCENARIOS.items():
+        body = callback_body(df, scenario)
+
+        def post():
+            response = client.post(
+                "/_dash-update-component", data=body, content_type="application/json"
+            )
+            assert response.status_code == 200, response.status_code
+            return response.data
+
+        payload = post()
+        paged = median_time(post, args.repeat)
+        rows = len(json.loads(payload)["response"]["player_table"]["data"])
+        old_payload = all_rows_payload(player_tabular, scenario)
+        old = median_time(
+            lambda: all_rows_payload(player_tabular, scenario), args.repeat
+        )
+        print(
+            f"{label}: all rows {len(old_payload) / 1024:.0f} KiB in "
+            f"{old * 1000:.1f} ms, one page ({rows} rows) "
+            f"{len(payload) / 1024:.1f} KiB in {paged * 1000:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Records EXPLAIN QUERY PLAN and the median time of every view in the database
+and of every query in snapshot.QUERIES, which the pages load their frames with,
+and exits with status 1 if any of them scans a whole table that is not in
+ALLOWED_SCANS.
+
+    python -m benchmarks.bench_query_plans --db data/FPL_DB.db
+"""
+import argparse
+import os
+import re
+import sqlite3
+import sys
+
+from benchmarks.common import median_time
+from src.data_extraction import snapshot
+
+# (query, table) pairs that read the whole table on purpose
+ALLOWED_SCANS = {
+    # Every player is listed, ranked or shown in the players table
+    ("view: PLAYER_TABULAR_VIEW", "players_static"),
+    ("view: PLAYER_WINDOW_METRICS_VIEW", "players_static"),
+    ("page: players", "players_static"),
+    # The window functions run over the whole season, hence the materialized table
+    ("view: PLAYER_WINDOW_METRICS_VIEW", "player_gw_detailed"),
+    # Every leaderboard is loaded at once
+    ("page: player_leaderboards", "player_leaderboards"),
+    # The GW chart plots every row
+    ("page: player_window_metrics", "player_window_metrics"),
+}
+
+SOURCE_ALIAS = re.compile(
+    r"\b(?:FROM|JOIN)\s+(?:\w+\.)?(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE
+)
+SQL_KEYWORDS = {"on", "where", "join", "inner", "left", "cross", "group", "order"}
+
+
+def source_aliases(conn, query):
+    """
+    Maps the lower case aliases used in query, and in the views it reads, to the
+    tables or views they stand for
+    """
+    views = dict(
+        conn.execute("SELECT LOWER(name), sql FROM sqlite_master WHERE type = 'view'")
+    )
+    aliases = {}
+    pending, seen = [query], set()
+    while pending:
+        text = pending.pop()
+        for source, alias in SOURCE_ALIAS.findall(text):
+            source = source.lower()
+            aliases[source] = source
+            if alias and alias.lower() not in SQL_KEYWORDS:
+                aliases[alias.lower()] = source
+            if source in views and source not in seen:
+                seen.add(source)
+                pending.append(views[source])
+    return aliases
+
+
+def full_scans(conn, query, plan):
+    """
+    Returns the tables that plan reads in full, ignoring scans of materialized
+    views, subqueries and CTEs
+    """
+    tables = {
+        name.lower()
+        for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        )
+    }
+    aliases = source_aliases(conn, query)
+    scanned = set()
+    for *_, detail in plan:
+        match = re.match(r"SCAN (\w+)", detail)
+        if match:
+            source = aliases.get(match.group(1).lower(), match.group(1).lower())
+            if source in tables:
+                scanned.add(source)
+    return scanned
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default=os.path.join("data", "FPL_DB.db"))
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    queries = {
+        f"view: {name}": f"SELECT * FROM {name}"
+        for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'view' ORDER BY name"
+        )
+    }
+    # The pages' current gameweek is read from current_gw_view, listed above
+    queries.update({f"page: {name}": query for name, query in snapshot.QUERIES.items()})
+
+    failures = []
+    for name, query in queries.items():
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {query}").fetchall()
+        elapsed = median_time(lambda: conn.execute(query).fetchall(), args.repeat)
+        print(f"{name}: {elapsed * 1000:.2f} ms")
+        for _, parent, _, detail in plan:
+            print(f"    {parent:>4} {detail}")
+        for table in sorted(full_scans(conn, query, plan)):
+            if (name, table) not in ALLOWED_SCANS:
+                failures.append(f"{name}: full scan of {table}")
+    conn.close()
+
+    if failures:
+        print("\nUnexpected full table scans:")
+        for failure in failures:
+            print(f"    {failure}")
+        sys.exit(1)
+    print("\nNo unexpected full table scans")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Latency of dashboard reads under concurrent requests. Runs the Home top players
+query from `--threads` threads at once, opening and closing a connection per
+request as the callbacks used to and through the per-thread read-only pool.
+Then sends the same number of parallel top performers callback requests to the
+app itself, which reads data/FPL_DB.db. Reports p50 and p99 latency. The query
+timings run on a copy of the given database.
+
+    python -m benchmarks.bench_read_pool --db data/FPL_DB.db --threads 32
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+import src.data_extraction.db_handler as dbh
+from benchmarks.bench_data_store import TOP_PLAYERS_QUERY
+from src.data_extraction.read_pool import ReadOnlyPool
+
+CALLBACK_REQUEST = {
+    "output": "top-performers-graph.figure",
+    "outputs": {"id": "top-performers-graph", "property": "figure"},
+    "inputs": [
+        {"id": "top-performers-dropdown", "property": "value", "value": "total_points"}
+    ],
+    "changedPropIds": ["top-performers-dropdown.value"],
+}
+
+
+def run_parallel(request, threads, requests_per_thread):
+    """
+    Calls request from every thread at once and returns the latency of each call
+    in milliseconds
+    """
+    barrier = threading.Barrier(threads)
+    latencies = []
+    lock = threading.Lock()
+
+    def worker():
+        barrier.wait()
+        timings = []
+        for _ in range(requests_per_thread):
+            start = time.perf_counter()
+            request()
+            timings.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(timings)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return np.array(latencies)
+
+
+def report(label, latencies):
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(f"{label}: p50 {p50:.2f} ms, p99 {p99:.2f} ms ({len(latencies)} requests)")
+
+
+def connection_per_request(db_name):
+    db = dbh.DBHandler(db_name)
+    db.conn.execute(TOP_PLAYERS_QUERY).fetchall()
+    db.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default=os.path.join("data", "FPL_DB.db"))
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    db_name = os.path.join(workdir, "FPL_DB.db")
+    shutil.copy(args.db, db_name)
+
+    latencies = run_parallel(
+        lambda: connection_per_request(db_name), args.threads, args.requests
+    )
+    report("Connection per request", latencies)
+
+    pool = ReadOnlyPool(db_name)
+    latencies = run_parallel(
+        lambda: pool.handler().conn.execute(TOP_PLAYERS_QUERY).fetchall(),
+        args.threads,
+        args.requests,
+    )
+    report("Read-only pool", latencies)
+    shutil.rmtree(workdir)
+
+    # The app resolves its pages and assets relative to src
+    os.chdir("src")
+    sys.path.insert(0, os.getcwd())
+    import app
+
+    client = app.server.test_client()
+    body = json.dumps(CALLBACK_REQUEST)
+
+    def callback():
+        response = client.post(
+            "/_dash-update-component", data=body, content_type="application/json"
+        )
+        assert response.status_code == 200, response.status_code
+
+    callback()
+    latencies = run_parallel(callback, args.threads, args.requests)
+    report("Top performers callback", latencies)
+
+
+if __name__ == "__main__":
+    main()
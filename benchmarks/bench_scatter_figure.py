@@ -0,0 +1,92 @@
+"""
+Build time and JSON size of the Player Overall Statistics scatter: plotly
+express with a trace per player and a name lookup per trace, as the page used
+to draw it, against the single WebGL trace of figures.player_scatter. Runs on
+the players table and on copies of it `--scale` times its size.
+
+    python -m benchmarks.bench_scatter_figure --scale 4
+"""
+import argparse
+
+import pandas as pd
+import plotly.express as px
+
+from benchmarks.common import median_time
+from src.data_extraction.db_handler import load_config
+from src.utils import figures
+from src.utils.data_store import DataStore
+
+X, Y, SIZE = "expected_goal_involvements", "goal_involvements", "form"
+
+
+def trace_per_player(dff, labels):
+    # What update_scatter did before the builder
+    dff = dff.assign(id=dff["id"].astype(str))
+    fig = px.scatter(
+        dff,
+        x=X,
+        y=Y,
+        color="id",
+        size=SIZE,
+        labels=labels
+        | {
+            "id": "Player ID",
+            "web_name": "Name",
+            "team_name": "Team",
+            "position": "Position",
+        },
+        hover_data=["web_name", "team_name", "position"],
+    )
+    fig.update_layout(
+        title=f"{labels[Y]} by {labels[X]}",
+        xaxis_title=labels[X],
+        yaxis_title=labels[Y],
+    )
+    fig.for_each_trace(
+        lambda t: t.update(
+            name=dff.loc[dff.id.astype(str) == t.name, "web_name"].iloc[0]
+        )
+    )
+    fig.for_each_trace(
+        lambda t: t.update(showlegend=False if t.marker.size == [0] else True)
+    )
+    return fig
+
+
+def single_trace(dff, labels):
+    return figures.player_scatter(
+        dff, X, Y, SIZE, labels=labels, title=f"{labels[Y]} by {labels[X]}"
+    )
+
+
+def benchmark(dff, label, labels, repeat):
+    results = []
+    for builder in [trace_per_player, single_trace]:
+        seconds = median_time(lambda: builder(dff, labels).to_json(), repeat)
+        fig = builder(dff, labels)
+        results.append(
+            f"{len(fig.data)} traces, {len(fig.to_json()) / 1024:.0f} KiB "
+            f"in {seconds * 1000:.0f} ms"
+        )
+    print(f"{label} ({len(dff)} players): {results[0]} -> {results[1]}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    labels = load_config()["static_column_names"]
+    df = DataStore().get()["player_table"]
+    df = df[df[SIZE] >= 0]
+    benchmark(df, "Players table", labels, args.repeat)
+    scaled = pd.concat(
+        [df.assign(id=df["id"] + i * (df["id"].max() + 1)) for i in range(args.scale)],
+        ignore_index=True,
+    )
+    benchmark(scaled, f"{args.scale}x players table", labels, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
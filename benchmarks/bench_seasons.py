@@ -0,0 +1,123 @@
+"""
+Season-partitioned storage. Builds `--seasons` synthetic seasons one after the
+other through build_db_tables, which archives each finished season to its own
+read-only file, and compares:
+
+- the size of the current season's database and of each archive
+- the current season's page queries on the database alone, with every archive
+  attached, and on a single file holding the rows of every season
+- cross-season queries over the attached archives
+
+    python -m benchmarks.bench_seasons --seasons 5 --players 700
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+import src.data_extraction.db_handler as dbh
+import src.data_extraction.fpl_api_handler as fpl
+from src.data_extraction import snapshot
+from benchmarks.bench_window_engine import multiply_seasons
+from benchmarks.common import median_time
+from benchmarks.stub_api import running_stub
+
+CROSS_SEASON_QUERIES = {
+    "one player in every season": """
+        SELECT season, total_points, minutes, now_cost
+        FROM ALL_SEASONS_PLAYERS_VIEW
+        WHERE code = 1
+        ORDER BY season
+    """,
+    "points by player over every season": """
+        SELECT code, SUM(total_points) AS total_points, COUNT(*) AS seasons
+        FROM ALL_SEASONS_PLAYERS_VIEW
+        GROUP BY code
+        ORDER BY total_points DESC
+        LIMIT 10
+    """,
+    "points per round by season": """
+        SELECT season, round, SUM(total_points)
+        FROM ALL_SEASONS_PLAYER_GW_VIEW
+        GROUP BY season, round
+    """,
+}
+
+
+def time_queries(conn, queries, repeat):
+    return {
+        name: median_time(lambda: conn.execute(query).fetchall(), repeat)
+        for name, query in queries.items()
+    }
+
+
+def print_times(label, times):
+    print(label)
+    for name, seconds in times.items():
+        print(f"  {name}: {seconds * 1000:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seasons", type=int, default=5)
+    parser.add_argument("--players", type=int, default=700)
+    parser.add_argument("--rounds", type=int, default=38)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    db_name = os.path.join(workdir, "FPL_DB.db")
+    seasons_dir = os.path.join(workdir, "seasons")
+    first_season = 2023 - args.seasons + 1
+    for season in range(first_season, 2024):
+        # Every season but the last has been played in full
+        current_round = args.rounds if season < 2023 else args.rounds - 5
+        with running_stub(
+            players=args.players,
+            rounds=args.rounds,
+            current_round=current_round,
+            season=season,
+            latency=0,
+        ) as url:
+            fpl.BASE_URL = url
+            dbh.build_db_tables(db_name, incremental=True, seasons_dir=seasons_dir)
+
+    print(f"Current season: {os.path.getsize(db_name) / 2**20:.1f} MB")
+    for name in sorted(os.listdir(seasons_dir)):
+        size = os.path.getsize(os.path.join(seasons_dir, name))
+        print(f"Archived {name}: {size / 2**20:.1f} MB")
+
+    db = dbh.DBHandler(db_name, read_only=True)
+    print_times(
+        "Current season alone", time_queries(db.conn, snapshot.QUERIES, args.repeat)
+    )
+    attached = db.attach_seasons(seasons_dir=seasons_dir)
+    print_times(
+        f"Current season with {len(attached)} archives attached",
+        time_queries(db.conn, snapshot.QUERIES, args.repeat),
+    )
+    print_times(
+        f"Cross-season queries over {len(attached) + 1} seasons",
+        time_queries(db.conn, CROSS_SEASON_QUERIES, args.repeat),
+    )
+    db.conn.close()
+
+    # The rows of every season in the current season's file instead
+    single_file = os.path.join(workdir, "single_file.db")
+    shutil.copy(db_name, single_file)
+    multiply_seasons(single_file, args.seasons)
+    single = dbh.DBHandler(single_file, read_only=True)
+    print(
+        f"Single file of {args.seasons} seasons: "
+        f"{os.path.getsize(single_file) / 2**20:.1f} MB"
+    )
+    print_times(
+        "Current season's queries on the single file",
+        time_queries(single.conn, snapshot.QUERIES, args.repeat),
+    )
+    single.conn.close()
+    shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
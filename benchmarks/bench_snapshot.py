@@ -0,0 +1,104 @@
+"""
+Time to load the dashboard frames with pd.read_sql_query, compacted as the
+SQLite fallback of snapshot.load_frame does, versus the memory-mapped Arrow
+snapshot, and the memory of several concurrent worker processes holding
+them. Unique set size (USS) is what each worker holds on its own and
+proportional set size (PSS) splits shared pages between the workers. Checks
+that both paths return identical frames first.
+
+    python -m benchmarks.bench_snapshot --db data/FPL_DB.db --workers 4
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pandas as pd
+import psutil
+
+from benchmarks.common import median_time
+from src.data_extraction import snapshot
+from src.data_extraction.db_handler import DBHandler
+
+
+def load_sqlite(db):
+    """
+    Loads the frames as the pages do without a snapshot, compacted after the read
+    """
+    return {
+        name: snapshot.compact_frame(pd.read_sql_query(query, db.conn))
+        for name, query in snapshot.QUERIES.items()
+    }
+
+
+def load_snapshot(db):
+    return {
+        name: snapshot.read_snapshot(db.conn, db.db_name, name)
+        for name in snapshot.QUERIES
+    }
+
+
+def run_worker(args):
+    db = DBHandler(args.db)
+    start = time.perf_counter()
+    frames = load_sqlite(db) if args.mode == "sqlite" else load_snapshot(db)
+    wall = time.perf_counter() - start
+    print(json.dumps({"wall_s": wall, "rows": sum(map(len, frames.values()))}))
+    sys.stdout.flush()
+    # Stay alive, holding the frames, until the parent has measured every worker
+    sys.stdin.readline()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default=os.path.join("data", "FPL_DB.db"))
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--mode", choices=["sqlite", "snapshot"])
+    args = parser.parse_args()
+
+    if args.mode:
+        run_worker(args)
+        return
+
+    db = DBHandler(args.db)
+    snapshot_frames = load_snapshot(db)
+    if any(df is None for df in snapshot_frames.values()):
+        sys.exit(f"No snapshot matching {args.db}, run a build first")
+    for name, df in load_sqlite(db).items():
+        pd.testing.assert_frame_equal(snapshot_frames[name], df)
+    print("Snapshot frames match SQLite")
+
+    for mode, load in [("sqlite", load_sqlite), ("snapshot", load_snapshot)]:
+        print(
+            f"{mode:>8}: load {median_time(lambda: load(db), args.repeat) * 1000:.1f} ms"
+        )
+    db.conn.close()
+
+    for mode in ["sqlite", "snapshot"]:
+        workers = [
+            subprocess.Popen(
+                [sys.executable, "-m", "benchmarks.bench_snapshot", f"--mode={mode}"]
+                + [f"--db={args.db}"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                text=True,
+            )
+            for _ in range(args.workers)
+        ]
+        walls = [json.loads(worker.stdout.readline())["wall_s"] for worker in workers]
+        memory = [psutil.Process(worker.pid).memory_full_info() for worker in workers]
+        for worker in workers:
+            worker.communicate("\n")
+        print(
+            f"{mode:>8}: {args.workers} workers, "
+            f"load {max(walls) * 1000:.0f} ms (slowest), "
+            f"USS {sum(m.uss for m in memory) / 2**20:.0f} MB, "
+            f"PSS {sum(m.pss for m in memory) / 2**20:.0f} MB in total"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Cold start of the dashboard, as gunicorn's `--chdir src app:server` sees it.
+Imports the app in a fresh interpreter under `-X importtime`, then reports:
+
+- the import time of each package, and of each of this repo's modules, counting
+  every module's own time once
+- the time to run each page module, which Dash imports itself
+- the time to the first response of the app shell, which includes loading the
+  data because Dash calls every page layout to validate callbacks against, of
+  its layout and its callback graph, then of each page's layout
+
+    python -m benchmarks.bench_startup --top 15
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+
+def child():
+    from importlib.machinery import SourceFileLoader
+
+    page_times = {}
+    exec_module = SourceFileLoader.exec_module
+
+    def timed_exec_module(loader, module):
+        start = time.perf_counter()
+        try:
+            return exec_module(loader, module)
+        finally:
+            if module.__name__.startswith("pages."):
+                page_times[module.__name__] = time.perf_counter() - start
+
+    SourceFileLoader.exec_module = timed_exec_module
+    os.chdir("src")
+    sys.path.insert(0, os.getcwd())
+
+    phases = {}
+    start = time.perf_counter()
+    import app
+
+    phases["import app"] = time.perf_counter() - start
+    import dash
+
+    client = app.server.test_client()
+    for path in ["/", "/_dash-layout", "/_dash-dependencies"]:
+        start = time.perf_counter()
+        assert client.get(path).status_code == 200, path
+        phases[f"GET {path}"] = time.perf_counter() - start
+    for page in dash.page_registry.values():
+        start = time.perf_counter()
+        if callable(page["layout"]):
+            page["layout"]()
+        phases[f"{page['name']} layout"] = time.perf_counter() - start
+    print(json.dumps({"phases": phases, "pages": page_times}))
+
+
+def import_times(stderr):
+    """
+    Own import time of each module in `python -X importtime` output, summed by
+    top level package, except for this repo's modules which are kept apart
+    """
+    groups = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, _, name = line[len("import time:") :].split("|")
+        name = name.strip()
+        group = name if name.split(".")[0] in ("src", "app") else name.split(".")[0]
+        groups[group] += int(own) / 1e6
+    return groups
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child()
+
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "benchmarks.bench_startup"]
+        + ["--child"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total = time.perf_counter() - start
+    report = json.loads(result.stdout.splitlines()[-1])
+    groups = import_times(result.stderr)
+
+    print(f"Imports: {sum(groups.values()) * 1000:.0f} ms")
+    for name, seconds in sorted(groups.items(), key=lambda item: -item[1])[: args.top]:
+        print(f"  {name}: {seconds * 1000:.0f} ms")
+    print("Page modules:")
+    for name, seconds in report["pages"].items():
+        print(f"  {name}: {seconds * 1000:.0f} ms")
+    print("After import:")
+    for name, seconds in report["phases"].items():
+        print(f"  {name}: {seconds * 1000:.0f} ms")
+    first_response = report["phases"]["import app"] + report["phases"]["GET /"]
+    print(
+        f"Time to first response: {first_response * 1000:.0f} ms after the "
+        f"interpreter started, {total * 1000:.0f} ms for the whole run"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Parity and speed of the NumPy window metrics engine against
+PLAYER_WINDOW_METRICS_VIEW, on a copy of the given database and on a synthetic
+multi-season database made of `--seasons` copies of it, each with its own
+player ids.
+
+Parity is checked for full materialization at the view's 5 round window and,
+against a copy of the view with a shorter window, at `--window`. It is also
+checked after refreshing only the latest round, and after refreshing the
+rounds after a double gameweek whose second fixture lost points.
+
+    python -m benchmarks.bench_window_engine --db data/FPL_DB.db --seasons 10
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import src.data_extraction.db_handler as dbh
+import src.data_extraction.window_metrics as wm
+from src.data_extraction import snapshot
+from benchmarks.common import median_time
+
+VIEW_WINDOW = 5
+
+
+def view_query(conn, window):
+    """
+    Query of PLAYER_WINDOW_METRICS_VIEW with its moving averages over `window`
+    rounds instead of 5
+    """
+    view_sql = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE name = 'PLAYER_WINDOW_METRICS_VIEW'"
+    ).fetchone()[0]
+    select = view_sql[view_sql.index("SELECT") :]
+    return select.replace(f"{VIEW_WINDOW - 1} PRECEDING", f"{window - 1} PRECEDING")
+
+
+def check_parity(db, window, label):
+    order = ["id", "round", "fixture"]
+    expected = pd.read_sql_query(view_query(db.conn, window), db.conn)
+    actual = pd.read_sql_query(snapshot.QUERIES["player_window_metrics"], db.conn)
+    pd.testing.assert_frame_equal(
+        actual.sort_values(order, ignore_index=True),
+        expected.sort_values(order, ignore_index=True),
+    )
+    print(f"Parity with the view: {label}")
+
+
+def negative_double_gameweek(db, points=-3):
+    """
+    Sets the later fixture of a player's double gameweek before the last round
+    to points, so their cumulative points drop within the round, and returns
+    (element, round)
+    """
+    element, round_ = db.conn.execute(
+        "SELECT element, round FROM player_gw_detailed "
+        "WHERE round < (SELECT MAX(round) FROM player_gw_detailed) "
+        "GROUP BY element, round HAVING COUNT(*) > 1 "
+        "ORDER BY element, round LIMIT 1"
+    ).fetchone()
+    db.conn.execute(
+        "UPDATE player_gw_detailed SET total_points = ? "
+        "WHERE element = ? AND round = ? AND fixture = ("
+        "SELECT MAX(fixture) FROM player_gw_detailed WHERE element = ? AND round = ?)",
+        (points, element, round_, element, round_),
+    )
+    db.conn.commit()
+    return element, round_
+
+
+def multiply_seasons(db_name, seasons):
+    """
+    Appends seasons - 1 copies of every player and their gameweek rows, each
+    under new player ids
+    """
+    conn = sqlite3.connect(db_name)
+    offset = conn.execute("SELECT MAX(id) + 1 FROM players_static").fetchone()[0]
+    for table, key in [("players_static", "id"), ("player_gw_detailed", "element")]:
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+        select = ", ".join(
+            f"{column} + ? * {offset}" if column == key else column
+            for column in columns
+        )
+        for season in range(1, seasons):
+            conn.execute(
+                f"INSERT INTO {table} SELECT {select} FROM {table} WHERE {key} < ?",
+                (season, offset),
+            )
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+def engine_inputs(db):
+    columns = ["element"] + wm.SOURCE_COLUMNS
+    rows = db.conn.execute(
+        f"SELECT {', '.join(columns)} FROM player_gw_detailed "
+        "ORDER BY element, round, fixture"
+    ).fetchall()
+    arrays = dict(zip(columns, map(np.array, zip(*rows))))
+    return arrays.pop("element"), arrays
+
+
+def benchmark(db, label, repeat):
+    rows = db.conn.execute("SELECT COUNT(*) FROM player_gw_detailed").fetchone()[0]
+    elements, sources = engine_inputs(db)
+    view = median_time(
+        lambda: db.conn.execute("SELECT * FROM PLAYER_WINDOW_METRICS_VIEW").fetchall(),
+        repeat,
+    )
+    compute = median_time(
+        lambda: wm.compute_window_metrics(elements, sources, VIEW_WINDOW), repeat
+    )
+    materialize = median_time(db.create_player_window_metrics, repeat)
+    print(
+        f"{label} ({rows} rows): view {view * 1000:.0f} ms, "
+        f"engine compute {compute * 1000:.0f} ms, "
+        f"engine materialization {materialize * 1000:.0f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default=os.path.join("data", "FPL_DB.db"))
+    parser.add_argument("--seasons", type=int, default=10)
+    parser.add_argument("--window", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    db_name = os.path.join(workdir, "FPL_DB.db")
+    shutil.copy(args.db, db_name)
+    db = dbh.DBHandler(db_name)
+    db.create_default_tables()
+    db.create_indexes()
+    db.create_views()
+
+    db.create_player_window_metrics(VIEW_WINDOW)
+    check_parity(db, VIEW_WINDOW, f"{VIEW_WINDOW} round window")
+    db.create_player_window_metrics(args.window)
+    check_parity(db, args.window, f"{args.window} round window")
+
+    db.create_player_window_metrics(VIEW_WINDOW)
+    db.conn.executescript(
+        """
+        CREATE TEMP TABLE player_gw_changes AS
+        SELECT * FROM player_gw_detailed
+        WHERE round = (SELECT MAX(round) FROM player_gw_detailed);
+        """
+    )
+    db.refresh_player_window_metrics(VIEW_WINDOW)
+    check_parity(db, VIEW_WINDOW, "latest round refreshed")
+
+    element, round_ = negative_double_gameweek(db)
+    db.create_player_window_metrics(VIEW_WINDOW)
+    db.conn.execute("DROP TABLE temp.player_gw_changes")
+    db.conn.execute(
+        "CREATE TEMP TABLE player_gw_changes AS SELECT * FROM player_gw_detailed "
+        "WHERE element = ? AND round > ?",
+        (element, round_),
+    )
+    db.refresh_player_window_metrics(VIEW_WINDOW)
+    check_parity(db, VIEW_WINDOW, "refreshed after a double gameweek losing points")
+
+    benchmark(db, "Real database", args.repeat)
+    db.conn.close()
+
+    multiply_seasons(db_name, args.seasons)
+    db = dbh.DBHandler(db_name)
+    benchmark(db, f"{args.seasons} synthetic seasons", args.repeat)
+    db.conn.close()
+    shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
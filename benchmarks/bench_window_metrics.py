@@ -0,0 +1,72 @@
+"""
+Query time of PLAYER_WINDOW_METRICS_VIEW versus the materialized
+player_window_metrics table joined to the gameweek and player columns, for the
+whole table and for a single player, plus
+the cost of a full materialization versus refreshing only the latest round.
+Runs on a copy of the given database.
+
+    python -m benchmarks.bench_window_metrics --db data/FPL_DB.db
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+import src.data_extraction.db_handler as dbh
+from src.data_extraction import snapshot
+from benchmarks.common import median_time
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default=os.path.join("data", "FPL_DB.db"))
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    db_name = os.path.join(workdir, "FPL_DB.db")
+    shutil.copy(args.db, db_name)
+    db = dbh.DBHandler(db_name)
+    db.create_views()
+
+    full = median_time(db.create_player_window_metrics, 3)
+    db.conn.executescript(
+        """
+        CREATE TEMP TABLE player_gw_changes AS
+        SELECT * FROM player_gw_detailed
+        WHERE round = (SELECT MAX(round) FROM player_gw_detailed);
+        """
+    )
+    latest_round = median_time(db.refresh_player_window_metrics, 3)
+
+    player_id = db.conn.execute(
+        "SELECT element FROM player_gw_detailed ORDER BY total_points DESC LIMIT 1"
+    ).fetchone()[0]
+    sources = {
+        "PLAYER_WINDOW_METRICS_VIEW": "SELECT * FROM PLAYER_WINDOW_METRICS_VIEW",
+        # The metrics with the gameweek and player columns joined on, as the
+        # pages load them
+        "player_window_metrics": snapshot.QUERIES["player_window_metrics"],
+    }
+    for source, query in sources.items():
+        whole = median_time(lambda: db.conn.execute(query).fetchall(), args.repeat)
+        single = median_time(
+            lambda: db.conn.execute(
+                f"SELECT * FROM ({query}) WHERE id = ?", (player_id,)
+            ).fetchall(),
+            args.repeat,
+        )
+        print(
+            f"{source:>26}: all rows {whole * 1000:.1f} ms, "
+            f"one player {single * 1000:.2f} ms"
+        )
+    print(
+        f"Materialize whole season {full * 1000:.0f} ms, "
+        f"refresh latest round {latest_round * 1000:.0f} ms"
+    )
+    db.conn.close()
+    shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Memory of the dashboard frames and of gunicorn workers holding them. Reports
+the frames' size with pandas' default dtypes and compacted, then starts
+`--workers` gunicorn workers on a copy of the database, with a snapshot of
+default or compacted dtypes, each loading its own frames as before or with the
+frames loaded once in the master before the workers are forked, as
+src/gunicorn.conf.py does. Reports their per-worker RSS, and the unique (USS)
+and proportional (PSS) set sizes of all of them.
+
+    python -m benchmarks.bench_worker_memory --workers 4
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import psutil
+
+from src.data_extraction import db_handler as dbh
+from src.data_extraction import snapshot
+from src.utils.data_store import DataStore
+
+READY_HOOK = """
+import os
+
+
+def post_worker_init(worker):
+    from src.utils.data_store import store
+
+    store.get()
+    open(os.path.join({ready_dir!r}, str(os.getpid())), "w").close()
+"""
+STORE = """
+from src.data_extraction import snapshot
+from src.utils import data_store
+
+if not {compact}:
+    snapshot.compact_frame = lambda df: df
+data_store.store = data_store.DataStore({db_name!r})
+"""
+PRELOAD = open(os.path.join("src", "gunicorn.conf.py")).read()
+
+
+def default_dtypes(df):
+    return df
+
+
+def frame_sizes():
+    data = DataStore().get()
+    frames = {
+        "player_table": data["player_table"],
+        "player_series": data["player_series"].df,
+    }
+    for name, df in frames.items():
+        default = df.assign(
+            **{
+                column: df[column].astype(str)
+                if df[column].dtype == "category"
+                else df[column].astype("int64")
+                if df[column].dtype.kind == "i"
+                else df[column].astype("float64")
+                if df[column].dtype.kind == "f"
+                else df[column]
+                for column in df.columns
+            }
+        )
+        print(
+            f"{name}: {default.memory_usage(deep=True).sum() / 2**20:.1f} MB with "
+            f"default dtypes, "
+            f"{snapshot.compact_frame(default).memory_usage(deep=True).sum() / 2**20:.1f} "
+            f"MB compacted"
+        )
+
+
+def export_copy(workdir, compact):
+    # A copy of the database with its own snapshot, so the one the app serves
+    # is left as it is
+    db_name = os.path.join(workdir, os.path.basename(dbh.DB_PATH))
+    shutil.copyfile(dbh.DB_PATH, db_name)
+    compact_frame = snapshot.compact_frame
+    if not compact:
+        snapshot.compact_frame = default_dtypes
+    try:
+        db = dbh.DBHandler(db_name)
+        db.export_snapshot()
+        db.conn.commit()
+        db.conn.close()
+    finally:
+        snapshot.compact_frame = compact_frame
+    return db_name
+
+
+def measure(compact, preload, workers):
+    workdir = tempfile.mkdtemp()
+    ready_dir = os.path.join(workdir, "ready")
+    os.mkdir(ready_dir)
+    setup = STORE.format(compact=compact, db_name=export_copy(workdir, compact))
+    if preload:
+        setup += PRELOAD
+    config = os.path.join(workdir, "gunicorn.conf.py")
+    with open(config, "w") as f:
+        f.write(setup + READY_HOOK.format(ready_dir=ready_dir))
+
+    master = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--chdir", "src", "-c", config]
+        + ["--workers", str(workers), "--bind", "127.0.0.1:0", "app:server"],
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while len(os.listdir(ready_dir)) < workers:
+            if master.poll() is not None:
+                sys.exit(f"gunicorn exited with status {master.returncode}")
+            time.sleep(0.2)
+        time.sleep(1)
+        memory = [
+            child.memory_full_info() for child in psutil.Process(master.pid).children()
+        ]
+    finally:
+        master.terminate()
+        master.wait()
+        shutil.rmtree(workdir)
+    label = (
+        f"{'compact' if compact else 'default'} dtypes, "
+        f"{'preloaded' if preload else 'per worker'}"
+    )
+    print(
+        f"{label}: RSS {sum(m.rss for m in memory) / len(memory) / 2**20:.0f} MB "
+        f"per worker, USS {sum(m.uss for m in memory) / 2**20:.0f} MB and "
+        f"PSS {sum(m.pss for m in memory) / 2**20:.0f} MB for {len(memory)} workers"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    frame_sizes()
+    for preload in (False, True):
+        for compact in (False, True):
+            measure(compact, preload, args.workers)
+
+
+if __name__ == "__main__":
+    main()
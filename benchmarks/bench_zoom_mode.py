@@ -0,0 +1,104 @@
+"""
+Server work for users zooming the Player Overall Statistics scatter, in each
+player_table_mode. In "server" mode every zoom is a request that filters, sorts
+and pages the table. In "client" mode each filter change sends the filtered
+players once and zooms are handled in the browser. Each simulated user makes
+one filter change and `--zooms` zooms. The server side of each request is
+timed by calling the functions the callbacks use.
+
+    python -m benchmarks.bench_zoom_mode --users 32 --zooms 20
+"""
+import argparse
+import json
+import random
+import time
+
+import plotly
+
+from src.data_extraction.db_handler import load_config
+from src.utils import data_table_module as dtm
+from src.utils.data_store import DataStore
+
+X, Y = "expected_goal_involvements", "goal_involvements"
+PAGE_SIZE = 15
+
+
+def visible_columns(config, position):
+    hidden = config["all_players_hidden_columns"]
+    if position is not None:
+        hidden = hidden + config[position.lower() + "_hidden_columns"]
+    return [i for i in config["static_column_names"] if i not in hidden]
+
+
+def server_request(data, config, filters, relayout):
+    # What update_player_table does for a zoom in "server" mode
+    df = data["player_table"]
+    mask = data["player_table_filter"].select(*filters)
+    mask = mask & (df[X] >= relayout[0]).to_numpy() & (df[X] <= relayout[1]).to_numpy()
+    mask = mask & (df[Y] >= relayout[2]).to_numpy() & (df[Y] <= relayout[3]).to_numpy()
+    records, _ = dtm.page_records(
+        df,
+        data["player_table_orders"],
+        mask,
+        [{"column_id": Y, "direction": "desc"}],
+        0,
+        PAGE_SIZE,
+        visible_columns(config, filters[0]),
+    )
+    return json.dumps(records, cls=plotly.utils.PlotlyJSONEncoder)
+
+
+def client_request(data, config, filters):
+    # What update_player_table_store does for a filter change in "client" mode
+    mask = data["player_table_filter"].select(*filters)
+    columns = visible_columns(config, filters[0])
+    values = dtm.columnar_data(data["player_table"], mask, columns + [X, Y])
+    return json.dumps(
+        {"values": values, "columns": columns, "x_axis": X, "y_axis": Y},
+        cls=plotly.utils.PlotlyJSONEncoder,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=32)
+    parser.add_argument("--zooms", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    config = load_config()
+    data = DataStore().get()
+    df = data["player_table"]
+    users = []
+    for _ in range(args.users):
+        position = rng.choice([None, "GKP", "DEF", "MID", "FWD"])
+        filters = (position, [], [0, int(df.minutes.max())], [0, 20])
+        zooms = [
+            sorted(rng.uniform(0, df[X].max()) for _ in range(2))
+            + sorted(rng.uniform(0, df[Y].max()) for _ in range(2))
+            for _ in range(args.zooms)
+        ]
+        users.append((filters, zooms))
+
+    for mode in ["server", "client"]:
+        requests = sent = 0
+        start = time.perf_counter()
+        for filters, zooms in users:
+            data["player_table_filter"].cache.clear()
+            if mode == "server":
+                payloads = [
+                    server_request(data, config, filters, zoom) for zoom in zooms
+                ]
+            else:
+                payloads = [client_request(data, config, filters)]
+            requests += len(payloads)
+            sent += sum(map(len, payloads))
+        seconds = time.perf_counter() - start
+        print(
+            f"{mode}: {requests} requests, {sent / 1024:.0f} KiB sent, "
+            f"{seconds * 1000:.0f} ms of server time"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Shared measurement helpers for the benchmark scripts
+"""
+import statistics
+import threading
+import time
+
+import psutil
+
+
+def process_tree_rss(process):
+    """
+    Resident memory of a process plus all of its children, in bytes
+    """
+    rss = process.memory_info().rss
+    for child in process.children(recursive=True):
+        try:
+            rss += child.memory_info().rss
+        except psutil.NoSuchProcess:
+            pass
+    return rss
+
+
+def measure(fn, *args, interval=0.005, **kwargs):
+    """
+    Runs fn and returns (result, wall seconds, peak RSS of the process tree in MB)
+    """
+    process = psutil.Process()
+    peak = process_tree_rss(process)
+    done = threading.Event()
+
+    def sample():
+        nonlocal peak
+        while not done.is_set():
+            peak = max(peak, process_tree_rss(process))
+            time.sleep(interval)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    try:
+        result = fn(*args, **kwargs)
+    finally:
+        wall = time.perf_counter() - start
+        done.set()
+        sampler.join()
+    return result, wall, peak / 2**20
+
+
+def call_times(fn, repeat):
+    """
+    Wall seconds of each of repeat calls of fn
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def median_time(fn, repeat):
+    """
+    Median wall seconds of repeat calls of fn
+    """
+    return statistics.median(call_times(fn, repeat))
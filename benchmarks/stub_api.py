@@ -0,0 +1,155 @@
+"""
+Local stand-in for the FPL API serving SyntheticAPI payloads, with optional
+per-request latency to mimic a real network round trip.
+
+    python -m benchmarks.stub_api --port 8765 --players 700 --latency 0.03
+
+Responses carry an ETag and honour If-None-Match with a bodyless 304.
+GET /stats returns the number of API requests, 304s and bytes served so far.
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.synthetic import SyntheticAPI
+
+ELEMENT_SUMMARY = re.compile(r"^/api/element-summary/(\d+)/$")
+
+
+def make_handler(api, latency):
+    payloads = {
+        "/api/bootstrap-static/": json.dumps(api.bootstrap_static()).encode(),
+        "/api/fixtures/": json.dumps(api.fixtures_payload()).encode(),
+    }
+    for element_id in api.histories:
+        payloads[f"/api/element-summary/{element_id}/"] = json.dumps(
+            api.element_summary(element_id)
+        ).encode()
+
+    etags = {
+        path: f'"{hashlib.sha1(body).hexdigest()}"' for path, body in payloads.items()
+    }
+    stats = {"requests": 0, "not_modified": 0, "bytes": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self.send_json(json.dumps(stats).encode())
+                return
+            time.sleep(latency)
+            body = payloads.get(self.path)
+            if body is None:
+                self.send_error(404)
+                return
+            if self.headers.get("If-None-Match") == etags[self.path]:
+                with lock:
+                    stats["requests"] += 1
+                    stats["not_modified"] += 1
+                self.send_response(304)
+                self.send_header("ETag", etags[self.path])
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            with lock:
+                stats["requests"] += 1
+                stats["bytes"] += len(body)
+            self.send_json(body, etags[self.path])
+
+        def send_json(self, body, etag=None):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            if etag:
+                self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def stub_stats(base_url):
+    """
+    Requests and bytes served by a running stub since it started
+    """
+    with urllib.request.urlopen(base_url.replace("/api", "/stats")) as response:
+        return json.load(response)
+
+
+@contextlib.contextmanager
+def running_stub(port=8765, latency=0.03, **options):
+    """
+    Runs the stub in a separate process so it does not share the benchmarked
+    process' GIL or memory, and yields its base URL. `options` are passed on
+    as command line flags, e.g. players=700 becomes --players=700
+    """
+    command = [
+        sys.executable,
+        "-m",
+        "benchmarks.stub_api",
+        f"--port={port}",
+        f"--latency={latency}",
+    ]
+    for name, value in options.items():
+        if value is not None:
+            command.append(f"--{name.replace('_', '-')}={value}")
+    root = os.path.join(os.path.dirname(__file__), "..")
+    process = subprocess.Popen(command, cwd=root)
+    base_url = f"http://127.0.0.1:{port}/api"
+    try:
+        for _ in range(600):
+            try:
+                stub_stats(base_url)
+                break
+            except OSError:
+                time.sleep(0.1)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--players", type=int, default=700)
+    parser.add_argument("--rounds", type=int, default=38)
+    parser.add_argument("--current-round", type=int, default=None)
+    parser.add_argument("--played-fixtures", type=int, default=None)
+    parser.add_argument("--latency", type=float, default=0.03)
+    parser.add_argument("--season", type=int, default=2023)
+    parser.add_argument("--postponed-fixtures", type=int, default=0)
+    args = parser.parse_args()
+
+    api = SyntheticAPI(
+        args.players,
+        args.rounds,
+        args.current_round,
+        args.played_fixtures,
+        season=args.season,
+        postponed_fixtures=args.postponed_fixtures,
+    )
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", args.port), make_handler(api, args.latency)
+    )
+    server.daemon_threads = True
+    server.request_queue_size = 128
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+"""
+Benchmark suite of the whole pipeline, run offline. A synthetic season of
+`--players` players and `--rounds` rounds, `--current-round` of them played,
+is served by the local stub once and
+recorded in an API response cache, and every timed build replays it. With
+`--fixtures DIR` the builds replay that response cache instead, e.g. one
+recorded by a real build in data/api_cache. `--seasons` copies the season's
+players and gameweeks under new ids before the rest is timed.
+
+Times, as the median and minimum of `--repeat` runs:
+
+- every stage of a full build, as its BuildReport records it, and with several
+  seasons the stages that derive tables from all of them
+- every view in create_views.sql
+- the data_table_module helpers and filter_df on the players table
+- every Dash callback, called directly with the callback cache off
+
+Results are written as JSON to benchmarks/results, and compared with the
+latest earlier result of the same parameters, or `--baseline`. Entries whose
+`--statistic`, the minimum by default as it is the least affected by other load
+on the machine, is more than `--threshold` slower, and at least `--min-delta`
+ms slower, are flagged as regressions and make the run exit with status 1.
+With `--enforce-budgets`, so does any build stage over its budget in
+build_stage_budgets in utils/config.yml.
+
+    python -m benchmarks.suite --players 700 --rounds 38 --seasons 3
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import src.data_extraction.db_handler as dbh
+import src.data_extraction.fpl_api_handler as fpl
+from src.data_extraction.build_report import BuildReport
+from benchmarks.bench_window_engine import multiply_seasons
+from benchmarks.common import call_times
+from benchmarks.stub_api import running_stub
+
+RESULTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "results"))
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# The stages that read every season, re-timed after the seasons are copied
+SEASON_STAGES = [
+    "create_player_window_metrics",
+    "create_player_leaderboards",
+    "export_snapshot",
+]
+
+
+def summary(times):
+    return {
+        "median_ms": statistics.median(times) * 1000,
+        "min_ms": min(times) * 1000,
+        "repeat": len(times),
+    }
+
+
+def record_fixtures(cache_dir, players, rounds, current_round):
+    """
+    Records the stub's responses for a synthetic season in cache_dir and returns
+    the base URL they are recorded under
+    """
+    db_name = os.path.join(cache_dir, "FPL_DB.db")
+    base_url = fpl.BASE_URL
+    with running_stub(
+        players=players, rounds=rounds, current_round=current_round, latency=0
+    ) as url:
+        fpl.BASE_URL = url
+        fpl.configure_cache(cache_dir)
+        try:
+            dbh.build_db_tables(db_name)
+        finally:
+            fpl.BASE_URL = base_url
+    os.remove(db_name)
+    return url
+
+
+def time_stages(db, stages, times):
+    for stage in stages:
+        start = time.perf_counter()
+        getattr(db, stage)()
+        times.setdefault(f"build: {stage}", []).append(time.perf_counter() - start)
+
+
+def build_stages(db_name, repeat, budgets):
+    """
+    Builds db_name from the configured response cache repeat times, timing each
+    stage as the build's report measures it. Returns the times and the stages
+    of any build that went over their budget in budgets
+    """
+    times = {}
+    over_budget = []
+    for _ in range(repeat):
+        if os.path.exists(db_name):
+            os.remove(db_name)
+        report = dbh.build_db_tables(db_name, report=BuildReport(log=False))
+        for stage in report.stages:
+            times.setdefault(f"build: {stage['stage']}", []).append(stage["seconds"])
+        over_budget += report.over_budget(budgets)
+    return times, over_budget
+
+
+def season_stages(db_name, seasons, repeat):
+    multiply_seasons(db_name, seasons)
+    times = {}
+    db = dbh.DBHandler(db_name)
+    for _ in range(repeat):
+        time_stages(db, SEASON_STAGES, times)
+    db.conn.close()
+    return {
+        name.replace("build:", f"{seasons} seasons build:"): stage_times
+        for name, stage_times in times.items()
+    }
+
+
+def view_times(db_name, repeat):
+    db = dbh.DBHandler(db_name, read_only=True)
+    views = [
+        name
+        for (name,) in db.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'view' ORDER BY name"
+        )
+    ]
+    times = {
+        f"view: {name}": call_times(
+            lambda: db.conn.execute(f"SELECT * FROM {name}").fetchall(), repeat
+        )
+        for name in views
+    }
+    db.conn.close()
+    return times
+
+
+def app_times(db_name, repeat):
+    """
+    Times the data helpers and every callback of the app serving db_name
+    """
+    # The app resolves its pages folder from the working directory, and the
+    # pages bind the store and the callback cache when they are imported
+    os.chdir(os.path.join(ROOT, "src"))
+    sys.path.insert(0, os.getcwd())
+    from src.utils import data_store
+
+    data_store.store = data_store.DataStore(db_name)
+    import app
+    from src.data_extraction import snapshot
+    from src.utils import data_table_module as dtm
+    from src.utils.app_config import config
+    from src.utils.callback_cache import cache
+
+    # Every call computes its output, as on a cache miss
+    cache.enabled = False
+    pages = {
+        page["module"]: sys.modules[page["module"]]
+        for page in app.dash.page_registry.values()
+    }
+    home = pages["pages.home"]
+    player_gw = pages["pages.player_gw"]
+    tabular = pages["pages.player_tabular"]
+
+    data = data_store.store.get()
+    df = data["player_table"]
+    db = data_store.store.pool.handler()
+    mask = data["player_table_filter"].select(None, [], [0, 10**6], [0, 10**6])
+    sort_by = [{"column_id": "total_points", "direction": "desc"}]
+    columns = config.visible_columns[None]
+    minutes = [0, df.minutes.max()]
+    price = [df.now_cost.min(), df.now_cost.max()]
+    position = data["positions"][0]
+    teams = data["teams"][:2]
+
+    def filter_df():
+        data["player_table_filter"].cache.clear()
+        return tabular.filter_df(position, teams, minutes, price)
+
+    calls = {
+        "dtm: load_players": lambda: dtm.load_players(db),
+        "dtm: load_fixtures": lambda: dtm.load_fixtures(db),
+        "dtm: load_player_window_metrics": lambda: dtm.load_player_window_metrics(db),
+        "dtm: load_player_leaderboards": lambda: dtm.load_player_leaderboards(db),
+        "dtm: format_name_by_availability": lambda: dtm.format_name_by_availability(
+            df.copy()
+        ),
+        "dtm: sort_orders": lambda: dtm.sort_orders(df),
+        "dtm: page_records": lambda: dtm.page_records(
+            df, data["player_table_orders"], mask, sort_by, 3, 15, columns
+        ),
+        "dtm: columnar_data": lambda: dtm.columnar_data(df, mask, columns),
+        "snapshot: compact_frame": lambda: snapshot.compact_frame(df),
+        "data store: load_frames": data_store.store.load_frames,
+        "filter_df": filter_df,
+        "callback: home.update_current_gw": lambda: home.update_current_gw(None),
+        "callback: home.top_players_graph": lambda: home.top_players_graph(
+            "total_points"
+        ),
+        "callback: player_gw.update_player_gw_graph top 10": lambda: (
+            player_gw.update_player_gw_graph("form", None, None, None)
+        ),
+        "callback: player_gw.update_player_gw_graph filtered": lambda: (
+            player_gw.update_player_gw_graph("cumulative_points", teams, position, None)
+        ),
+        "callback: player_gw.update_player_dropdown": lambda: (
+            player_gw.update_player_dropdown(position, teams)
+        ),
+        "callback: player_tabular.update_scatter": lambda: tabular.update_scatter(
+            "expected_goal_involvements",
+            "goal_involvements",
+            "form",
+            None,
+            [],
+            minutes,
+            price,
+        ),
+        "callback: player_tabular.reset_filters": lambda: tabular.reset_filters(1),
+    }
+    if config.player_table_mode == "client":
+        calls["callback: player_tabular.update_player_table_store"] = lambda: (
+            tabular.update_player_table_store(
+                None,
+                [],
+                minutes,
+                price,
+                "expected_goal_involvements",
+                "goal_involvements",
+            )
+        )
+    else:
+        calls["callback: player_tabular.player_table_page"] = lambda: (
+            tabular.player_table_page(
+                None,
+                [],
+                minutes,
+                price,
+                None,
+                "expected_goal_involvements",
+                "goal_involvements",
+                0,
+                sort_by,
+            )
+        )
+
+    times = {name: call_times(call, repeat) for name, call in calls.items()}
+    os.chdir(ROOT)
+    return times
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def latest_result(parameters, exclude):
+    """
+    Path of the latest result in RESULTS_DIR run with the same parameters
+    """
+    for path in sorted(glob.glob(os.path.join(RESULTS_DIR, "*.json")), reverse=True):
+        if path == exclude:
+            continue
+        with open(path) as f:
+            if json.load(f)["parameters"] == parameters:
+                return path
+    return None
+
+
+def regressions(results, baseline, statistic, threshold, min_delta):
+    """
+    Names, baseline and current values of statistic of the results slower than
+    in baseline by more than threshold times and min_delta ms
+    """
+    slower = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        now, then = result[f"{statistic}_ms"], before[f"{statistic}_ms"]
+        if now > then * (1 + threshold) and now - then >= min_delta:
+            slower.append((name, then, now))
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, default=700)
+    parser.add_argument("--rounds", type=int, default=38)
+    parser.add_argument("--seasons", type=int, default=1)
+    # Five rounds before the end of the season by default, so the players
+    # table has its next five fixtures
+    parser.add_argument("--current-round", type=int)
+    parser.add_argument("--fixtures", help="API response cache to replay")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--build-repeat", type=int, default=3)
+    parser.add_argument("--baseline", help="Result to compare with")
+    parser.add_argument("--statistic", choices=["min", "median"], default="min")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--min-delta", type=float, default=1.0)
+    parser.add_argument("--output", help="Where to write the result")
+    parser.add_argument(
+        "--enforce-budgets",
+        action="store_true",
+        help="Fail if a build stage goes over its budget in build_stage_budgets",
+    )
+    args = parser.parse_args()
+    if args.current_round is None:
+        args.current_round = max(args.rounds - 5, 1)
+
+    parameters = {
+        "players": None if args.fixtures else args.players,
+        "rounds": None if args.fixtures else args.rounds,
+        "current_round": None if args.fixtures else args.current_round,
+        "seasons": args.seasons,
+        "fixtures": os.path.abspath(args.fixtures) if args.fixtures else None,
+    }
+    output = os.path.abspath(
+        args.output
+        or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    )
+    workdir = tempfile.mkdtemp()
+    db_name = os.path.join(workdir, "FPL_DB.db")
+    cache_dir = args.fixtures
+    if cache_dir is None:
+        cache_dir = os.path.join(workdir, "api_cache")
+        fpl.BASE_URL = record_fixtures(
+            cache_dir, args.players, args.rounds, args.current_round
+        )
+    fpl.configure_cache(cache_dir, replay=True)
+
+    budgets = dbh.build_stage_budgets() if args.enforce_budgets else {}
+    times, over_budget = build_stages(db_name, args.build_repeat, budgets)
+    if args.seasons > 1:
+        times.update(season_stages(db_name, args.seasons, args.build_repeat))
+    fpl.configure_cache(None)
+    times.update(view_times(db_name, args.repeat))
+    times.update(app_times(db_name, args.repeat))
+    shutil.rmtree(workdir)
+
+    results = {name: summary(name_times) for name, name_times in times.items()}
+    for name, result in results.items():
+        print(
+            f"{name}: {result['median_ms']:.2f} ms median, "
+            f"{result['min_ms']:.2f} ms min"
+        )
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(
+            {
+                "parameters": parameters,
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    print(f"Results written to {output}")
+
+    for stage in over_budget:
+        print(
+            f"Build stage {stage['stage']} took {stage['seconds']:.1f} s, over its "
+            f"budget of {budgets[stage['stage']]} s"
+        )
+
+    baseline = args.baseline or latest_result(parameters, output)
+    if baseline is None:
+        if over_budget:
+            sys.exit(1)
+        return
+    with open(baseline) as f:
+        baseline_results = json.load(f)["results"]
+    slower = regressions(
+        results, baseline_results, args.statistic, args.threshold, args.min_delta
+    )
+    print(f"Compared with {baseline}: {len(slower)} regressions")
+    for name, then, now in slower:
+        print(f"  {name}: {then:.2f} ms -> {now:.2f} ms")
+    if slower or over_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
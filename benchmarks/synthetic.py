@@ -0,0 +1,242 @@
+"""
+Synthetic FPL API payloads shaped like the real endpoints. Every column in
+create_tables.sql is filled, so the payloads can be fed straight into DBHandler.
+"""
+import datetime
+import os
+import random
+import sqlite3
+
+QUERIES_DIR = os.path.join(
+    os.path.dirname(__file__), "..", "src", "data_extraction", "queries"
+)
+POSITIONS = ["GKP", "DEF", "MID", "FWD"]
+
+
+def table_columns():
+    """
+    Returns {table: [(column, type), ...]} for every table in create_tables.sql
+    """
+    conn = sqlite3.connect(":memory:")
+    with open(os.path.join(QUERIES_DIR, "create_tables.sql"), "r") as f:
+        conn.executescript(f.read())
+    tables = [
+        row[0]
+        for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    ]
+    columns = {
+        table: [(row[1], row[2]) for row in conn.execute(f"PRAGMA table_info({table})")]
+        for table in tables
+    }
+    conn.close()
+    return columns
+
+
+def random_value(rng, column_type):
+    if column_type == "INTEGER":
+        return rng.randint(0, 100)
+    if column_type == "DOUBLE":
+        return round(rng.uniform(0, 10), 2)
+    return "x"
+
+
+class SyntheticAPI:
+    """
+    Deterministic fake FPL season starting in August of `season`, with
+    `n_players` players, `n_rounds` gameweeks and `current_round` gameweeks
+    played so far. `played_fixtures` limits how many fixtures of the current
+    round have been played, to mimic a matchday. The first `postponed_fixtures`
+    fixtures after the current round are served without a gameweek, as the API
+    does for fixtures postponed without a new date
+    """
+
+    def __init__(
+        self,
+        n_players=700,
+        n_rounds=38,
+        current_round=None,
+        played_fixtures=None,
+        n_teams=20,
+        seed=0,
+        season=2023,
+        postponed_fixtures=0,
+    ):
+        self.n_players = n_players
+        self.n_rounds = n_rounds
+        self.current_round = n_rounds if current_round is None else current_round
+        self.played_fixtures = played_fixtures
+        self.n_teams = n_teams
+        self.seed = seed
+        self.season = season
+        self.postponed_fixtures = postponed_fixtures
+        self.columns = table_columns()
+        self.fixtures = self._make_fixtures()
+        self.histories = {
+            element_id: self._make_history(element_id)
+            for element_id in range(1, n_players + 1)
+        }
+
+    def _rng(self, *key):
+        return random.Random(":".join(map(str, (self.seed,) + key)))
+
+    def _team(self, element_id):
+        return (element_id - 1) % self.n_teams + 1
+
+    def _make_fixtures(self):
+        rng = self._rng("fixtures")
+        fixtures = []
+        for event in range(1, self.n_rounds + 1):
+            teams = list(range(1, self.n_teams + 1))
+            rng.shuffle(teams)
+            for team_h, team_a in zip(teams[::2], teams[1::2]):
+                fixtures.append(
+                    {
+                        "id": len(fixtures) + 1,
+                        "event": event,
+                        "team_h": team_h,
+                        "team_a": team_a,
+                        "team_h_difficulty": rng.randint(2, 5),
+                        "team_a_difficulty": rng.randint(2, 5),
+                    }
+                )
+        return fixtures
+
+    def fixtures_payload(self):
+        played = {fixture["id"] for fixture in self.played()}
+        postponed = {
+            fixture["id"]
+            for fixture in self.fixtures
+            if fixture["event"] > self.current_round
+        }
+        postponed = set(sorted(postponed)[: self.postponed_fixtures])
+        return [
+            dict(
+                fixture,
+                started=fixture["id"] in played,
+                event=None if fixture["id"] in postponed else fixture["event"],
+            )
+            for fixture in self.fixtures
+        ]
+
+    def played(self):
+        """
+        Fixtures played so far, in kickoff order
+        """
+        played = [f for f in self.fixtures if f["event"] < self.current_round]
+        current = [f for f in self.fixtures if f["event"] == self.current_round]
+        return played + current[: self.played_fixtures]
+
+    def _make_history(self, element_id):
+        team = self._team(element_id)
+        history = []
+        for fixture in self.played():
+            if team not in (fixture["team_h"], fixture["team_a"]):
+                continue
+            rng = self._rng("history", element_id, fixture["id"])
+            row = {
+                name: random_value(rng, column_type)
+                for name, column_type in self.columns["player_gw_detailed"]
+            }
+            row.update(
+                element=element_id,
+                fixture=fixture["id"],
+                round=fixture["event"],
+                was_home=team == fixture["team_h"],
+                opponent_team=fixture["team_a"]
+                if team == fixture["team_h"]
+                else fixture["team_h"],
+                kickoff_time=f"2023-08-{fixture['event']:02d}T15:00:00Z",
+                minutes=rng.choice([0, 0, 20, 60, 90, 90]),
+                total_points=rng.randint(0, 12),
+                goals_scored=rng.choice([0, 0, 0, 1, 2]),
+                assists=rng.choice([0, 0, 0, 1]),
+                bonus=rng.choice([0, 0, 1, 2, 3]),
+            )
+            history.append(row)
+        return history
+
+    def bootstrap_static(self):
+        return {
+            "teams": [
+                {"id": i, "name": f"Team {i}", "code": i, "short_name": f"T{i:02d}"}
+                for i in range(1, self.n_teams + 1)
+            ],
+            "element_types": [
+                {
+                    "id": i,
+                    "singular_name_short": name,
+                    "squad_max_play": 5,
+                    "squad_min_play": 1,
+                }
+                for i, name in enumerate(POSITIONS, start=1)
+            ],
+            "element_stats": [
+                {"name": name, "label": name}
+                for name, _ in self.columns["player_gw_detailed"]
+            ],
+            "events": [self._event(i) for i in range(1, self.n_rounds + 1)],
+            "elements": [
+                self._element(element_id) for element_id in range(1, self.n_players + 1)
+            ],
+        }
+
+    def _event(self, event_id):
+        rng = self._rng("event", event_id)
+        event = {
+            name: random_value(rng, column_type)
+            for name, column_type in self.columns["events_static"]
+        }
+        event.pop("top_element_info_id")
+        event.pop("top_element_info_points")
+        event.update(
+            id=event_id,
+            name=f"Gameweek {event_id}",
+            deadline_time=(
+                datetime.date(self.season, 8, 11)
+                + datetime.timedelta(weeks=event_id - 1)
+            ).strftime("%Y-%m-%dT17:30:00Z"),
+            finished=event_id < self.current_round,
+            is_current=event_id == self.current_round,
+            is_previous=event_id == self.current_round - 1,
+            is_next=event_id == self.current_round + 1,
+            top_element_info={"id": rng.randint(1, self.n_players), "points": 20}
+            if event_id <= self.current_round
+            else None,
+        )
+        return event
+
+    def _element(self, element_id):
+        rng = self._rng("element", element_id)
+        element = {
+            name: random_value(rng, column_type)
+            for name, column_type in self.columns["players_static"]
+        }
+        history = self.histories[element_id]
+        element.update(
+            id=element_id,
+            web_name=f"Player {element_id}",
+            code=element_id,
+            first_name="Player",
+            second_name=str(element_id),
+            team=self._team(element_id),
+            element_type=rng.randint(1, 4),
+            now_cost=rng.randint(40, 130),
+            chance_of_playing_this_round=rng.choice([None, None, None, 75, 25, 0]),
+            minutes=sum(row["minutes"] for row in history),
+            total_points=sum(row["total_points"] for row in history),
+            event_points=sum(
+                row["total_points"]
+                for row in history
+                if row["round"] == self.current_round
+            ),
+            goals_scored=sum(row["goals_scored"] for row in history),
+            assists=sum(row["assists"] for row in history),
+        )
+        return element
+
+    def element_summary(self, element_id):
+        return {
+            "history": self.histories[element_id],
+            "fixtures": [],
+            "history_past": [],
+        }
@@ -4,6 +4,6 @@ setuptools.setup(
     name="fpl_dashboard",
     version="0.0.1",
     author="Hriday Baghar",
-    packages=setuptools.find_packages(),
+    packages=setuptools.find_packages(exclude=["benchmarks"]),
     classifiers=[],
 )
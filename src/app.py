@@ -1,16 +1,15 @@
 import dash
-from dash import Dash, dcc, html, dash_table as dt, Input, Output
+from dash import Dash, html
 import dash_bootstrap_components as dbc
-import plotly.express as px
-import pandas as pd
-from yaml import safe_load
-from src.data_extraction import db_handler as dbh
-from src.utils import data_table_module as dtm
 import os
+from src.utils.app_config import config
+from src.utils.metrics import metrics
 
 pages_folder=os.path.join(os.path.dirname(__name__), "pages")
 app = Dash(external_stylesheets=[dbc.themes.BOOTSTRAP], use_pages=True, routes_pathname_prefix="/", name=__name__, pages_folder=pages_folder)
 server = app.server
+if config.metrics_enabled:
+    metrics.instrument(app)
 
 app.layout = html.Div(
     [
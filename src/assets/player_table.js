@@ -0,0 +1,69 @@
+// Clientside paging, sorting and zoom filtering of the players table, used
+// when player_table_mode is "client" in utils/config.yml. The store holds the
+// filtered players as one list of values per column.
+
+function inRange(value, low, high) {
+    return value !== null && value >= low && value <= high;
+}
+
+function compareValues(a, b) {
+    // Missing values go last in either direction, as in data_table_module.sort_orders
+    if (a === null || b === null) {
+        return (a === null) - (b === null);
+    }
+    return a < b ? -1 : a > b ? 1 : 0;
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    player_table: {
+        page: function (store, relayoutData, page_current, sort_by, page_size) {
+            if (!store) {
+                return [[], [], 0, 1];
+            }
+            const values = store.values;
+            // Any change other than paging or sorting starts again from the
+            // first page, sorted by the y-axis
+            const triggered = dash_clientside.callback_context.triggered.map(
+                (t) => t.prop_id
+            );
+            if (!triggered.includes("player_table.page_current")) {
+                page_current = 0;
+                if (!triggered.includes("player_table.sort_by")) {
+                    sort_by = [{column_id: store.y_axis, direction: "desc"}];
+                }
+            }
+
+            let rows = [...values[store.columns[0]].keys()];
+            if (relayoutData && "xaxis.range[0]" in relayoutData) {
+                const x = values[store.x_axis];
+                rows = rows.filter((i) => inRange(
+                    x[i], relayoutData["xaxis.range[0]"], relayoutData["xaxis.range[1]"]
+                ));
+            }
+            if (relayoutData && "yaxis.range[0]" in relayoutData) {
+                const y = values[store.y_axis];
+                rows = rows.filter((i) => inRange(
+                    y[i], relayoutData["yaxis.range[0]"], relayoutData["yaxis.range[1]"]
+                ));
+            }
+            if (sort_by && sort_by.length) {
+                const column = values[sort_by[0].column_id];
+                const sign = sort_by[0].direction === "asc" ? 1 : -1;
+                rows.sort((a, b) => {
+                    const [va, vb] = [column[a], column[b]];
+                    if (va === null || vb === null) {
+                        return compareValues(va, vb);
+                    }
+                    return sign * compareValues(va, vb);
+                });
+            }
+
+            const page = rows.slice(page_current * page_size, (page_current + 1) * page_size);
+            const data = page.map((i) => Object.fromEntries(
+                store.columns.map((column) => [column, values[column][i]])
+            ));
+            const page_count = Math.max(Math.ceil(rows.length / page_size), 1);
+            return [data, sort_by, page_current, page_count];
+        },
+    },
+});
@@ -0,0 +1,91 @@
+"""
+Per-stage report of a database build. Each stage records its wall time, the
+API responses it received and their bytes, the rows it wrote and the peak
+memory of the build so far. A JSON line is printed for each stage as it ends,
+and the whole report can be written to a file and checked against time
+budgets from build_stage_budgets in utils/config.yml.
+"""
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+import src.data_extraction.fpl_api_handler as fpl
+
+
+def peak_rss_mb():
+    """
+    Peak resident memory of this process so far. Cheaper than tracemalloc, which
+    slows every executemany down several times over
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+class BuildReport:
+    """
+    Stages of one build in the order they ran, each a dict of its measurements
+    """
+
+    def __init__(self, log=True):
+        self.log = log
+        self.stages = []
+        self.started_at = time.time()
+
+    @contextmanager
+    def stage(self, name, conn=None):
+        """
+        Measures the block as stage name, counting the rows written on conn
+        """
+        transfers = fpl.transfer_stats()
+        changes = conn.total_changes if conn is not None else 0
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end_transfers = fpl.transfer_stats()
+            stage = {
+                "stage": name,
+                "seconds": round(time.perf_counter() - start, 6),
+                "requests": end_transfers["requests"] - transfers["requests"],
+                "bytes": end_transfers["bytes"] - transfers["bytes"],
+                "rows": conn.total_changes - changes if conn is not None else 0,
+                "peak_rss_mb": round(peak_rss_mb(), 1),
+            }
+            self.stages.append(stage)
+            if self.log:
+                print(json.dumps(stage))
+
+    def over_budget(self, budgets):
+        """
+        Returns the stages that took longer than their budget in seconds
+        """
+        return [
+            stage
+            for stage in self.stages
+            if stage["stage"] in budgets and stage["seconds"] > budgets[stage["stage"]]
+        ]
+
+    def to_dict(self, budgets=None):
+        return {
+            "started_at": self.started_at,
+            "seconds": round(sum(stage["seconds"] for stage in self.stages), 3),
+            "stages": self.stages,
+            "budgets": budgets or {},
+            "over_budget": [
+                stage["stage"] for stage in self.over_budget(budgets or {})
+            ],
+        }
+
+    def write(self, path, budgets=None):
+        """
+        Writes the report as JSON to path, replacing any earlier report at once
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.to_dict(budgets), f, indent=2)
+        os.replace(tmp_path, path)
@@ -1,9 +1,63 @@
-from functools import partial
+import argparse
+from contextlib import contextmanager
+import json
 import sqlite3 as sql
-from tqdm import tqdm
+import time
+import sys
 import src.data_extraction.fpl_api_handler as fpl
-from multiprocessing import Pool
+from src.data_extraction.build_report import BuildReport, peak_rss_mb
+import src.data_extraction.snapshot as snapshot
+import src.data_extraction.window_metrics as wm
 import os
+import re
+import shutil
+from urllib.request import pathname2url
+import numpy as np
+import yaml
+
+# Anchored to the repo rather than the working directory, which differs
+# between the build script, gunicorn and the benchmarks
+DATA_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "..", "data"))
+DB_PATH = os.path.join(DATA_DIR, "FPL_DB.db")
+CACHE_DIR = os.path.join(DATA_DIR, "api_cache")
+REPORT_PATH = os.path.join(DATA_DIR, "build_report.json")
+# Finished seasons, one database file each
+SEASONS_DIR = os.path.join(DATA_DIR, "seasons")
+QUERIES_DIR = os.path.join(os.path.dirname(__file__), "queries")
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "..", "utils", "config.yml")
+# Connection settings for read_only handlers
+READ_MMAP_SIZE = 256 * 2**20
+READ_CACHE_SIZE_KIB = 65536
+CACHED_STATEMENTS = 256
+
+
+def load_config():
+    # The libyaml loader, where PyYAML was built with it, parses the config
+    # about ten times faster
+    with open(CONFIG_PATH, "r") as f:
+        return yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+
+def build_stage_budgets():
+    """
+    Seconds each build stage may take, by stage name
+    """
+    return load_config().get("build_stage_budgets") or {}
+
+
+def season_name(deadline_time):
+    """
+    Name of the season, e.g. 2023-24, whose first deadline is deadline_time
+    """
+    year = int(deadline_time[:4])
+    return f"{year}-{(year + 1) % 100:02d}"
+
+
+def moving_average_window():
+    """
+    Number of rounds the moving averages of player_window_metrics cover
+    """
+    return load_config()["moving_average_window"]
 
 
 class DBHandler:
@@ -11,15 +65,85 @@ class DBHandler:
     Class with methods to create a database and perform operations on it
     """
 
-    def __init__(self, db_name="../data/FPL_DB.db"):
+    def __init__(self, db_name=DB_PATH, bootstrap=None, read_only=False):
         self.db_name = db_name
-        self.conn = sql.connect(self.db_name)
+        self.bootstrap = bootstrap if bootstrap is not None else fpl.BootstrapSnapshot()
+        self.read_only = read_only
+        # Opened by URI so that ATTACH takes URIs too, see attach_seasons
+        uri = f"file:{pathname2url(os.path.abspath(db_name))}"
+        if read_only:
+            # mode=ro fails rather than creating a missing database, and
+            # query_only guards against writes through e.g. ATTACH
+            self.conn = sql.connect(
+                f"{uri}?mode=ro", uri=True, cached_statements=CACHED_STATEMENTS
+            )
+            self.conn.execute("PRAGMA query_only = ON")
+            self.conn.execute(f"PRAGMA mmap_size = {READ_MMAP_SIZE}")
+            self.conn.execute(f"PRAGMA cache_size = -{READ_CACHE_SIZE_KIB}")
+        else:
+            self.conn = sql.connect(uri, uri=True)
         self.cursor = self.conn.cursor()
+        self.bulk_load = False
 
     def create_default_tables(self):
-        with open("data_extraction/queries/create_tables.sql", "r") as f:
+        # player_window_metrics used to copy every gameweek and player column,
+        # dropped here so the next refresh computes it again in full
+        if "web_name" in self.get_table_columns("player_window_metrics"):
+            self.conn.execute("DROP TABLE player_window_metrics")
+        with open(os.path.join(QUERIES_DIR, "create_tables.sql"), "r") as f:
+            self.cursor.executescript(f.read())
+
+    def create_indexes(self):
+        """
+        Creates secondary indexes, after the bulk of the rows are loaded
+        """
+
+        with open(os.path.join(QUERIES_DIR, "create_indexes.sql"), "r") as f:
             self.cursor.executescript(f.read())
 
+    def begin_bulk_load(self, journal_mode="MEMORY", cache_size_kib=262144):
+        """
+        Switches to build-time write settings and opens a single transaction that
+        every create_* step writes into until end_bulk_load is called.
+
+        The rollback journal is kept in memory rather than turned off, so batch
+        savepoints can still roll back. Use journal_mode="WAL" when updating a
+        database that must survive a crash mid-build
+        """
+
+        self.conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+        self.conn.execute("PRAGMA synchronous = OFF")
+        self.conn.execute(f"PRAGMA cache_size = -{cache_size_kib}")
+        self.conn.execute("PRAGMA temp_store = MEMORY")
+        self.conn.execute("BEGIN")
+        self.bulk_load = True
+
+    def end_bulk_load(self):
+        """
+        Commits the bulk load transaction, builds the deferred indexes, refreshes
+        planner statistics and restores the default durability settings
+        """
+
+        self.conn.commit()
+        self.bulk_load = False
+        self.create_indexes()
+        self.conn.execute("ANALYZE")
+        self.conn.execute("PRAGMA journal_mode = DELETE")
+        self.conn.execute("PRAGMA synchronous = FULL")
+
+    @contextmanager
+    def transaction(self):
+        """
+        Commits on success and rolls back on error like `with self.conn`, unless
+        a bulk load is holding one transaction open for the whole build
+        """
+
+        if self.bulk_load:
+            yield
+        else:
+            with self.conn:
+                yield
+
     def get_table_columns(self, table_name):
         """
         Returns a list of all columns in a table
@@ -36,47 +160,49 @@ class DBHandler:
         self.cursor.execute(f"SELECT DISTINCT {column_name} FROM {table_name}")
         return [row[0] for row in self.cursor.fetchall()]
 
-    def get_insert_query(self, table_name):
+    def get_insert_query(self, table_name, upsert=False):
         """
         Returns a query string to update or insert rows in a table
         """
 
         columns = self.get_table_columns(table_name)
-        insert_query = f"INSERT INTO {table_name} VALUES (:{', :'.join(columns)})"
+        verb = "INSERT OR REPLACE" if upsert else "INSERT"
+        insert_query = f"{verb} INTO {table_name} VALUES (:{', :'.join(columns)})"
 
         return insert_query
 
-    def static_inserts(self):
+    def static_inserts(self, upsert=False):
         """
         Inserts static data into the database - data that is not updated every week
         """
 
-        teams_static = fpl.get_static_data("teams")
-        positions_static = fpl.get_static_data("element_types")
-        metric_names_static = fpl.get_static_data("element_stats")
+        verb = "INSERT OR REPLACE" if upsert else "INSERT"
+        teams_static = self.bootstrap.get("teams")
+        positions_static = self.bootstrap.get("element_types")
+        metric_names_static = self.bootstrap.get("element_stats")
 
-        with self.conn:
+        with self.transaction():
             self.conn.executemany(
-                "INSERT INTO teams_static VALUES (:id, :name, :code, :short_name)",
+                f"{verb} INTO teams_static VALUES (:id, :name, :code, :short_name)",
                 teams_static,
             )
             self.conn.executemany(
-                "INSERT INTO positions_static VALUES (:id, :singular_name_short, :squad_max_play, :squad_min_play)",
+                f"{verb} INTO positions_static VALUES (:id, :singular_name_short, :squad_max_play, :squad_min_play)",
                 positions_static,
             )
             self.conn.executemany(
-                "INSERT INTO metric_names_static VALUES (:name, :label)",
+                f"{verb} INTO metric_names_static VALUES (:name, :label)",
                 metric_names_static,
             )
 
-    def create_events(self):
+    def create_events(self, upsert=False):
         """
         Inserts events into the events_static table
         """
         print("Fetching Events table...")
-        insert_query = self.get_insert_query("events_static")
+        insert_query = self.get_insert_query("events_static", upsert)
         try:
-            events = fpl.get_static_data("events")
+            events = [dict(event) for event in self.bootstrap.get("events")]
 
             for event in events:
                 try:
@@ -93,10 +219,10 @@ class DBHandler:
             print("No current events")
             return
 
-        with self.conn:
+        with self.transaction():
             self.conn.executemany(insert_query, events)
 
-    def create_fixtures(self):
+    def create_fixtures(self, upsert=False):
         """
         Inserts fixtures into the fixtures table
         """
@@ -107,81 +233,606 @@ class DBHandler:
             print("No fixtures")
             return
 
-        insert_query = self.get_insert_query("fixtures")
+        insert_query = self.get_insert_query("fixtures", upsert)
 
-        with self.conn:
+        with self.transaction():
+            if upsert:
+                # Fixtures postponed without a new date leave the payload, as a
+                # full build would leave them out
+                self.conn.execute(
+                    "DELETE FROM fixtures WHERE id NOT IN (SELECT value FROM json_each(?))",
+                    (json.dumps([fixture["id"] for fixture in fixtures]),),
+                )
             self.conn.executemany(insert_query, fixtures)
 
-    def create_player_static(self):
+        return fixtures
+
+    def create_player_static(self, upsert=False):
         """
         Inserts players into the players_static table
         """
         print("Fetching player static info...")
         try:
-            players = fpl.get_static_data("elements")
+            players = self.bootstrap.get("elements")
         except IndexError:
             print("No players")
             return
 
-        insert_query = self.get_insert_query("players_static")
-
-        with self.conn:
+        insert_query = self.get_insert_query("players_static", upsert)
+
+        with self.transaction():
+            if upsert:
+                # Players removed from the game are dropped with their rows, as
+                # a full build would never fetch them
+                ids = json.dumps([player["id"] for player in players])
+                for table, key in [
+                    ("players_static", "id"),
+                    ("player_gw_detailed", "element"),
+                    ("player_window_metrics", "id"),
+                ]:
+                    self.conn.execute(
+                        f"DELETE FROM {table} WHERE {key} NOT IN (SELECT value FROM json_each(?))",
+                        (ids,),
+                    )
             self.conn.executemany(insert_query, players)
 
-    def create_player_gw_detailed(self):
+    def get_changed_players(self, fixtures):
+        """
+        Returns ids of players whose bootstrap totals differ from their stored
+        players_static row, including players that are not stored yet. Players
+        on teams with a started fixture that has no stored gameweek rows are
+        included too, as benched players get a new row without any totals moving,
+        and so are players quarantined by the previous update
         """
-        Updates player_gw_detailed table with player data for each gameweek
+
+        self.cursor.execute(
+            "SELECT id, minutes, total_points, event_points FROM players_static"
+        )
+        stored = {row[0]: row[1:] for row in self.cursor.fetchall()}
+
+        self.cursor.execute("SELECT DISTINCT fixture FROM player_gw_detailed")
+        stored_fixtures = {row[0] for row in self.cursor.fetchall()}
+        new_fixture_teams = {
+            team
+            for fixture in fixtures
+            if fixture["started"] and fixture["id"] not in stored_fixtures
+            for team in (fixture["team_h"], fixture["team_a"])
+        }
+
+        self.cursor.execute("SELECT DISTINCT element FROM player_gw_quarantine")
+        quarantined = {row[0] for row in self.cursor.fetchall()}
+
+        return [
+            player["id"]
+            for player in self.bootstrap.get("elements")
+            if player["team"] in new_fixture_teams
+            or player["id"] in quarantined
+            or stored.get(player["id"])
+            != (player["minutes"], player["total_points"], player["event_points"])
+        ]
+
+    def create_player_gw_detailed(self, players=None, upsert=False, batch_size=2000):
+        """
+        Updates player_gw_detailed table with player data for each gameweek,
+        for all players in players_static unless a list of ids is given.
+
+        Histories are inserted in batches of `batch_size` rows while the other
+        fetches are still running, and rows that cannot be inserted are moved to
+        player_gw_quarantine instead of failing the build
         """
 
         print("Fetching player detailed info...")
-        self.cursor.execute("SELECT id FROM players_static")
+        if players is None:
+            self.cursor.execute("SELECT id FROM players_static")
+
+            players = self.cursor.fetchall()
+            players = [p[0] for p in players]
+
+        table_name = "player_gw_detailed"
+        if upsert:
+            # Not executescript, which would commit a bulk load transaction
+            self.cursor.execute("DROP TABLE IF EXISTS temp.player_gw_staging")
+            self.cursor.execute(
+                "CREATE TEMP TABLE player_gw_staging AS "
+                "SELECT * FROM player_gw_detailed WHERE 0"
+            )
+            table_name = "player_gw_staging"
+        insert_query = self.get_insert_query(table_name)
+
+        start = time.perf_counter()
+
+        rows = 0
+        batch = []
+        with self.transaction():
+            self.conn.execute("DELETE FROM player_gw_quarantine")
+            for element_id, history, error in fpl.iter_players_info(
+                players, key="history"
+            ):
+                if error is not None:
+                    self.quarantine_row(element_id, None, error)
+                    continue
+                batch.extend(history)
+                if len(batch) >= batch_size:
+                    rows += self.insert_batch(insert_query, batch)
+                    batch = []
+            rows += self.insert_batch(insert_query, batch)
+
+        elapsed = time.perf_counter() - start
+        quarantined = self.conn.execute(
+            "SELECT COUNT(*) FROM player_gw_quarantine"
+        ).fetchone()[0]
+        print(
+            f"Inserted {rows} player gameweek rows in {elapsed:.1f}s "
+            f"({rows / elapsed:.0f} rows/s, peak RSS {peak_rss_mb():.0f} MB), "
+            f"{quarantined} quarantined"
+        )
+
+        if upsert:
+            self.upsert_player_gw_detailed()
+
+    def insert_batch(self, insert_query, batch):
+        """
+        Inserts a batch of rows in one executemany, falling back to row by row
+        inserts to quarantine the bad rows if the batch fails. Returns the number
+        of rows inserted
+        """
 
-        players = self.cursor.fetchall()
-        players = [p[0] for p in players]
+        # A failed executemany leaves its earlier rows behind, so undo them
+        self.conn.execute("SAVEPOINT insert_batch")
+        try:
+            self.conn.executemany(insert_query, batch)
+            self.conn.execute("RELEASE insert_batch")
+            return len(batch)
+        except (sql.Error, KeyError, TypeError):
+            self.conn.execute("ROLLBACK TO insert_batch")
+            self.conn.execute("RELEASE insert_batch")
+
+        inserted = 0
+        for row in batch:
+            try:
+                self.conn.execute(insert_query, row)
+                inserted += 1
+            except (sql.Error, KeyError, TypeError) as e:
+                self.quarantine_row(row.get("element"), row, e)
+        return inserted
+
+    def quarantine_row(self, element_id, row, error):
+        """
+        Records a player gameweek row, or a player whose history could not be
+        fetched when row is None, in player_gw_quarantine
+        """
 
-        insert_query = self.get_insert_query("player_gw_detailed")
+        print("Quarantining player", element_id, repr(error))
+        self.conn.execute(
+            "INSERT INTO player_gw_quarantine VALUES (?, ?, ?)",
+            (element_id, None if row is None else json.dumps(row), repr(error)),
+        )
 
-        history = []
-        with Pool(8) as p:
-            with tqdm(total=len(players)) as pbar:
-                for i, data in enumerate(
-                    p.imap(partial(fpl.get_player_info, key="history"), players)
-                ):
-                    history.append(data)
-                    pbar.update()
+    def upsert_player_gw_detailed(self):
+        """
+        Writes only the (element, round, fixture) rows in temp.player_gw_staging
+        that are new or differ from the stored ones. The written rows are kept in
+        temp.player_gw_changes until the connection is closed
+        """
 
-        with self.conn:
-            for player in history:
-                try:
-                    self.conn.executemany(insert_query, player)
-                except:
-                    print("Error inserting player", player[0]["element"])
-                    raise Exception
+        with self.transaction():
+            self.conn.execute("DROP TABLE IF EXISTS temp.player_gw_changes")
+            # Both sides go through the same column affinities, so unchanged rows
+            # compare equal even though the API sends e.g. xG as strings
+            self.conn.execute(
+                """
+                CREATE TEMP TABLE player_gw_changes AS
+                SELECT * FROM player_gw_staging
+                EXCEPT
+                SELECT * FROM player_gw_detailed
+                WHERE element IN (SELECT element FROM player_gw_staging)
+                """
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO player_gw_detailed SELECT * FROM player_gw_changes"
+            )
+            self.conn.execute("DROP TABLE player_gw_staging")
+
+        changed = self.conn.execute("SELECT COUNT(*) FROM player_gw_changes").fetchone()
+        print(f"Upserted {changed[0]} player gameweek rows")
 
     def create_views(self):
         """
         Creates views for the database
         """
 
-        with open("data_extraction/queries/create_views.sql", "r") as f:
+        with open(os.path.join(QUERIES_DIR, "create_views.sql"), "r") as f:
             self.cursor.executescript(f.read())
 
+    def create_player_window_metrics(self, window=None):
+        """
+        Computes player_window_metrics for every player's whole season
+        """
+
+        with self.transaction():
+            self.conn.execute("DROP TABLE IF EXISTS temp.window_refresh")
+            self.conn.execute(
+                "CREATE TEMP TABLE window_refresh AS "
+                "SELECT DISTINCT element, 0 AS from_round FROM player_gw_detailed"
+            )
+            self.conn.execute("DELETE FROM player_window_metrics")
+        self.compute_player_window_metrics(window)
+        self.conn.execute("ANALYZE player_window_metrics")
 
-def build_db_tables():
+    def refresh_player_window_metrics(self, window=None):
+        """
+        Recomputes player_window_metrics only for the rounds in
+        temp.player_gw_changes onwards, starting from each player's running
+        state at the previous round instead of recomputing the whole season
+        """
+
+        self.cursor.execute("SELECT 1 FROM player_window_metrics LIMIT 1")
+        if self.cursor.fetchone() is None:
+            self.create_player_window_metrics(window)
+            return
+
+        with self.transaction():
+            self.conn.execute("DROP TABLE IF EXISTS temp.window_refresh")
+            self.conn.execute(
+                "CREATE TEMP TABLE window_refresh AS "
+                "SELECT element, MIN(round) AS from_round "
+                "FROM temp.player_gw_changes GROUP BY element"
+            )
+        self.compute_player_window_metrics(window)
+
+    def compute_player_window_metrics(self, window=None):
+        """
+        Replaces the player_window_metrics rows of the players and rounds in
+        temp.window_refresh with ones computed by the window_metrics engine, over
+        a moving average window of `window` rounds, by default the one in
+        config.yml
+        """
+
+        window = window or moving_average_window()
+        with open(os.path.join(QUERIES_DIR, "select_player_window_rows.sql")) as f:
+            self.cursor.execute(f.read(), (max(window - 2, 0),))
+        names = [column[0] for column in self.cursor.description]
+        columns = dict(zip(names, map(np.array, zip(*self.cursor.fetchall()))))
+
+        new_rows = []
+        if columns:
+            is_new = columns["is_new"].astype(bool)
+            metrics = wm.compute_window_metrics(
+                columns["element"],
+                {source: columns[source] for source in wm.SOURCE_COLUMNS},
+                window,
+                is_new,
+                {
+                    column: columns[f"previous_{column}"]
+                    for column in wm.CUMULATIVE_COLUMNS
+                },
+            )
+            new_rows = zip(
+                *(
+                    columns[key][is_new].tolist()
+                    for key in ["element", "round", "fixture"]
+                ),
+                *(metrics[column].tolist() for column in wm.METRIC_COLUMNS),
+            )
+
+        with self.transaction():
+            self.conn.execute(
+                """
+                DELETE FROM player_window_metrics
+                WHERE (id, round, fixture) IN (
+                    SELECT metrics.id, metrics.round, metrics.fixture
+                    FROM temp.window_refresh refresh
+                    CROSS JOIN player_window_metrics metrics
+                    ON metrics.id = refresh.element
+                    AND metrics.round >= refresh.from_round
+                )
+                """
+            )
+            self.conn.executemany(
+                "INSERT INTO player_window_metrics VALUES "
+                f"({', '.join('?' * (len(wm.METRIC_COLUMNS) + 3))})",
+                new_rows,
+            )
+
+    def create_player_leaderboards(self):
+        """
+        Ranks every player within their position by each of the configured
+        leaderboard metrics and keeps the top of each ranking, so the Home page
+        reads a prebuilt slice instead of ranking the players on every callback
+        """
+
+        config = load_config()
+        columns = self.get_table_columns("PLAYER_TABULAR_VIEW")
+        with open(os.path.join(QUERIES_DIR, "insert_player_leaderboard.sql")) as f:
+            insert_query = f.read()
+        with self.transaction():
+            self.conn.execute("DELETE FROM player_leaderboards")
+            for metric in config["leaderboard_metrics"]:
+                if metric not in columns:
+                    raise ValueError(f"Unknown leaderboard metric {metric}")
+                self.conn.execute(
+                    insert_query.format(metric=metric),
+                    {"metric": metric, "size": config["leaderboard_size"]},
+                )
+
+    def season(self):
+        """
+        Name of the season in the database, or None before its events are loaded
+        """
+
+        try:
+            self.cursor.execute("SELECT MIN(deadline_time) FROM events_static")
+        except sql.OperationalError:
+            return None
+        deadline_time = self.cursor.fetchone()[0]
+        return season_name(deadline_time) if deadline_time else None
+
+    def archive_season(self, seasons_dir=SEASONS_DIR):
+        """
+        Writes a VACUUMed, read-only copy of the database to seasons_dir, named
+        after its season, and returns its path. A season archived before is
+        left as it is
+        """
+
+        path = os.path.join(seasons_dir, f"{self.season()}.db")
+        if os.path.exists(path):
+            return path
+        os.makedirs(seasons_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        self.conn.commit()
+        self.conn.execute("VACUUM INTO ?", (tmp_path,))
+        os.chmod(tmp_path, 0o444)
+        os.replace(tmp_path, path)
+        return path
+
+    def attach_seasons(self, seasons=None, seasons_dir=SEASONS_DIR):
+        """
+        Attaches the archived seasons in seasons_dir, every one but the
+        database's own by default, as immutable read-only schemas named
+        season_<year>_<year>. Then creates the temp views
+        ALL_SEASONS_PLAYERS_VIEW and ALL_SEASONS_PLAYER_GW_VIEW over them and the
+        database. Returns the names of the attached seasons. SQLite attaches at
+        most 10 databases unless built with a higher limit
+        """
+
+        current = self.season()
+        if seasons is None:
+            seasons = (
+                sorted(
+                    name[: -len(".db")]
+                    for name in os.listdir(seasons_dir)
+                    if name.endswith(".db")
+                )
+                if os.path.isdir(seasons_dir)
+                else []
+            )
+        seasons = [season for season in seasons if season != current]
+        schemas = {current: "main"} if current else {}
+        for season in seasons:
+            if not re.fullmatch(r"\d{4}-\d{2}", season):
+                raise ValueError(f"Invalid season name {season}")
+            path = os.path.abspath(os.path.join(seasons_dir, f"{season}.db"))
+            schemas[season] = f"season_{season.replace('-', '_')}"
+            # immutable skips locking and change checks, as nothing writes to it
+            self.conn.execute(
+                f"ATTACH DATABASE ? AS {schemas[season]}",
+                (f"file:{pathname2url(path)}?mode=ro&immutable=1",),
+            )
+
+        # Views over attached schemas can only be temp views, which query_only
+        # also blocks although they never touch the database file
+        if self.read_only:
+            self.conn.execute("PRAGMA query_only = OFF")
+        try:
+            for view, query_file in [
+                ("ALL_SEASONS_PLAYERS_VIEW", "select_season_players.sql"),
+                ("ALL_SEASONS_PLAYER_GW_VIEW", "select_season_player_gw.sql"),
+            ]:
+                with open(os.path.join(QUERIES_DIR, query_file)) as f:
+                    query = f.read()
+                selects = [
+                    query.format(season=season, schema=schema)
+                    for season, schema in sorted(schemas.items())
+                ]
+                self.conn.execute(f"DROP VIEW IF EXISTS temp.{view}")
+                if selects:
+                    self.conn.execute(
+                        f"CREATE TEMP VIEW {view} AS {' UNION ALL '.join(selects)}"
+                    )
+        finally:
+            if self.read_only:
+                self.conn.execute("PRAGMA query_only = ON")
+        return seasons
+
+    def export_snapshot(self):
+        """
+        Writes the columnar snapshot of the dashboard-facing views next to the
+        database
+        """
+
+        snapshot.export_snapshot(self.conn, self.db_name)
+
+
+def build_db_tables(
+    db_name=DB_PATH,
+    incremental=False,
+    vacuum=False,
+    seasons_dir=SEASONS_DIR,
+    report=None,
+):
+    """
+    Builds the database from scratch, or with incremental=True updates a copy
+    of the existing database, then moves the result over db_name. A database of an earlier season than the API's
+    is archived to seasons_dir first, and the new season built from scratch.
+    Each stage is measured into report, a BuildReport, which is returned
+    """
+    report = report if report is not None else BuildReport()
+    bootstrap = fpl.BootstrapSnapshot()
+    with report.stage("fetch_bootstrap"):
+        # Every event of the season, as none has started before the first
+        # deadline, which is when the API moves on to a new season
+        deadlines = [event["deadline_time"] for event in bootstrap.raw("events")]
+    api_season = season_name(min(deadlines)) if deadlines else None
+    if os.path.exists(db_name):
+        db = DBHandler(db_name, bootstrap)
+        season = db.season()
+        if season is not None and api_season is not None and season != api_season:
+            with report.stage("archive_season", db.conn):
+                archive = db.archive_season(seasons_dir)
+            print(f"Archiving the {season} season to {archive}")
+            incremental = False
+        db.conn.close()
+
+    # Built in a file next to db_name that replaces it once complete, so the
+    # running app never finds the database missing or half built
+    build_name = f"{db_name}.build"
     try:
-        os.remove("../data/FPL_DB.db")
+        os.remove(build_name)
     except FileNotFoundError:
         pass
-    db = DBHandler()
-    db.create_default_tables()
-    db.static_inserts()
-    db.create_events()
-    db.create_fixtures()
-    db.create_player_static()
-    db.create_player_gw_detailed()
-    db.create_views()
+    try:
+        if incremental and os.path.exists(db_name):
+            shutil.copyfile(db_name, build_name)
+            update_db_tables(build_name, vacuum, bootstrap, report)
+        else:
+            create_db_tables(build_name, vacuum, bootstrap, report)
+        os.replace(build_name, db_name)
+    except BaseException:
+        if os.path.exists(build_name):
+            os.remove(build_name)
+        raise
+    return report
+
+
+def create_db_tables(db_name=DB_PATH, vacuum=False, bootstrap=None, report=None):
+    """
+    Creates every table of a new database at db_name and fills it from the API.
+    Each stage is measured into report, a BuildReport, which is returned
+    """
+    report = report if report is not None else BuildReport()
+    db = DBHandler(db_name, bootstrap)
+    with report.stage("create_default_tables", db.conn):
+        db.create_default_tables()
+    db.begin_bulk_load()
+    with report.stage("static_inserts", db.conn):
+        db.static_inserts()
+    with report.stage("create_events", db.conn):
+        db.create_events()
+    with report.stage("create_fixtures", db.conn):
+        db.create_fixtures()
+    with report.stage("create_player_static", db.conn):
+        db.create_player_static()
+    with report.stage("create_player_gw_detailed", db.conn):
+        db.create_player_gw_detailed()
+    with report.stage("end_bulk_load", db.conn):
+        db.end_bulk_load()
+    with report.stage("create_views", db.conn):
+        db.create_views()
+    with report.stage("create_player_window_metrics", db.conn):
+        db.create_player_window_metrics()
+    with report.stage("create_player_leaderboards", db.conn):
+        db.create_player_leaderboards()
+    if vacuum:
+        # Last, after the derived tables have been rewritten and left their
+        # old pages free
+        with report.stage("vacuum", db.conn):
+            db.conn.execute("VACUUM")
+    with report.stage("export_snapshot", db.conn):
+        db.export_snapshot()
+    db.conn.close()
+    return report
+
+
+def update_db_tables(db_name=DB_PATH, vacuum=False, bootstrap=None, report=None):
+    """
+    Upserts static tables, events and fixtures, then refetches element-summary
+    only for players whose bootstrap totals changed since the last update.
+    Each stage is measured into report, a BuildReport, which is returned
+    """
+    report = report if report is not None else BuildReport()
+    db = DBHandler(db_name, bootstrap)
+    with report.stage("create_default_tables", db.conn):
+        db.create_default_tables()
+    db.begin_bulk_load(journal_mode="WAL")
+    with report.stage("static_inserts", db.conn):
+        db.static_inserts(upsert=True)
+    with report.stage("create_events", db.conn):
+        db.create_events(upsert=True)
+    with report.stage("create_fixtures", db.conn):
+        fixtures = db.create_fixtures(upsert=True)
+    with report.stage("get_changed_players", db.conn):
+        changed_players = db.get_changed_players(fixtures or [])
+    print(f"{len(changed_players)} players changed since the last update")
+    with report.stage("create_player_static", db.conn):
+        db.create_player_static(upsert=True)
+    with report.stage("create_player_gw_detailed", db.conn):
+        db.create_player_gw_detailed(changed_players, upsert=True)
+    with report.stage("end_bulk_load", db.conn):
+        db.end_bulk_load()
+    with report.stage("create_views", db.conn):
+        db.create_views()
+    with report.stage("refresh_player_window_metrics", db.conn):
+        db.refresh_player_window_metrics()
+    with report.stage("create_player_leaderboards", db.conn):
+        db.create_player_leaderboards()
+    if vacuum:
+        with report.stage("vacuum", db.conn):
+            db.conn.execute("VACUUM")
+    with report.stage("export_snapshot", db.conn):
+        db.export_snapshot()
     db.conn.close()
+    return report
 
 
 if __name__ == "__main__":
-    build_db_tables()
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Update the existing database instead of rebuilding it",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=CACHE_DIR,
+        help="Directory of the on-disk API response cache",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Do not cache API responses"
+    )
+    parser.add_argument(
+        "--replay",
+        action="store_true",
+        help="Build only from cached API responses, without network access",
+    )
+    parser.add_argument(
+        "--vacuum", action="store_true", help="VACUUM the database after the build"
+    )
+    parser.add_argument(
+        "--report",
+        default=REPORT_PATH,
+        help="Where to write the JSON report of the build's stages",
+    )
+    parser.add_argument(
+        "--enforce-budgets",
+        action="store_true",
+        help="Exit with status 1 if a stage took longer than its budget in "
+        "build_stage_budgets, instead of only warning",
+    )
+    args = parser.parse_args()
+
+    if not args.no_cache:
+        fpl.configure_cache(args.cache_dir, replay=args.replay)
+    report = build_db_tables(incremental=args.incremental, vacuum=args.vacuum)
+    fpl.prune_cache()
+    budgets = build_stage_budgets()
+    report.write(args.report, budgets)
+    over_budget = report.over_budget(budgets)
+    for stage in over_budget:
+        print(
+            f"Stage {stage['stage']} took {stage['seconds']:.1f} s, over its "
+            f"budget of {budgets[stage['stage']]} s"
+        )
+    if over_budget and args.enforce_budgets:
+        sys.exit(1)
@@ -1,15 +1,184 @@
+import asyncio
+import json
+import os
+import queue
+import threading
+import time
+
 import requests
+from requests.adapters import HTTPAdapter
+from tqdm import tqdm
+from urllib3.util.retry import Retry
+
+from src.data_extraction.response_cache import ResponseCache
+
+BASE_URL = os.environ.get("FPL_API_URL", "https://fantasy.premierleague.com/api")
+
+# Defaults for both the blocking session and the async fetch engine
+TIMEOUT = 10
+RETRIES = 3
+BACKOFF = 0.5
+CONCURRENCY = 16
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_cache = None
+# Responses received and their body bytes, 304s counting as empty, read by
+# the build report. Guarded by a lock since iter_players_info fetches on a
+# background thread
+_transfers = {"requests": 0, "bytes": 0}
+_transfers_lock = threading.Lock()
+
+def count_transfer(size):
+    with _transfers_lock:
+        _transfers["requests"] += 1
+        _transfers["bytes"] += size
+
+def transfer_stats():
+    """
+    Returns the number of responses received from the API so far and the bytes
+    of their bodies
+    """
+    with _transfers_lock:
+        return dict(_transfers)
+
+def configure_cache(cache_dir, replay=False):
+    """
+    Keep raw responses in an on-disk ResponseCache at cache_dir and revalidate
+    them with conditional requests, or stop caching when cache_dir is None.
+    With replay=True responses are only read from the cache, never the network
+    """
+    global _cache
+    _cache = None if cache_dir is None else ResponseCache(cache_dir, replay)
+
+def prune_cache():
+    """
+    Deletes the cached bodies no URL refers to any more, if caching is on
+    """
+    if _cache is not None:
+        pruned = _cache.prune()
+        print(f"Pruned {pruned} stale responses from the cache")
+
+def get_session():
+    """
+    Get the keep-alive session shared by every blocking request in this process
+    """
+    global _session
+    if _session is None:
+        retry = Retry(
+            total=RETRIES, backoff_factor=BACKOFF, status_forcelist=RETRY_STATUSES
+        )
+        _session = requests.Session()
+        _session.mount("https://", HTTPAdapter(max_retries=retry))
+        _session.mount("http://", HTTPAdapter(max_retries=retry))
+    return _session
 
 def get_json_data(url):
     """
     Get data from the FPL API.
     """
-    response = requests.get(url)
+    if _cache is not None and _cache.replay:
+        return json.loads(_cache.load(url))
+
+    headers = {} if _cache is None else _cache.conditional_headers(url)
+    response = get_session().get(url, headers=headers, timeout=TIMEOUT)
+    count_transfer(len(response.content))
+    response.raise_for_status()
+
+    if _cache is not None:
+        if response.status_code == 304:
+            return json.loads(_cache.load(url))
+        _cache.store(url, response.content, response.headers)
     return response.json()
 
-def get_static_data(key):
+async def fetch_json_data(session, url, retries=RETRIES, backoff=BACKOFF):
+    """
+    Get data from the FPL API on an aiohttp session, retrying with exponential
+    backoff on timeouts, connection errors and retryable status codes
     """
-    Get requested data key from bootstrap-static endpoint
+    # aiohttp is imported by the fetches that use it rather than with the
+    # module, which the dashboard imports through db_handler but never fetches
+    # with, so the app does not pay for it at startup
+    import aiohttp
+
+    if _cache is not None and _cache.replay:
+        return json.loads(_cache.load(url))
+
+    headers = {} if _cache is None else _cache.conditional_headers(url)
+    for attempt in range(retries + 1):
+        try:
+            async with session.get(url, headers=headers) as response:
+                body = await response.read()
+                count_transfer(len(body))
+                if response.status not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    if _cache is None:
+                        return json.loads(body)
+                    if response.status == 304:
+                        return json.loads(_cache.load(url))
+                    _cache.store(url, body, response.headers)
+                    return json.loads(body)
+                error = aiohttp.ClientResponseError(
+                    response.request_info, (), status=response.status
+                )
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            error = e
+
+        if attempt == retries:
+            raise error
+        await asyncio.sleep(backoff * 2**attempt)
+
+class BootstrapSnapshot:
+    """
+    Single fetch of the bootstrap-static endpoint, parsed once and shared by
+    every consumer until it is older than `ttl` seconds or invalidated.
+    Returned values are shared between callers and must not be mutated
+    """
+
+    def __init__(self, ttl=3600):
+        self.ttl = ttl
+        self._data = None
+        self._fetched_at = None
+
+    def get(self, key):
+        """
+        Get requested data key from the snapshot, fetching it if needed
+
+        Useful keys:
+        - teams
+        - events (GW overview for FPL)
+        - elements (players)
+        - element_types (player types)
+        - elements_stats (map of player stats labels and column names)
+        """
+        #Keeping data till current GW (might have to change to get data only for current GW)
+        if key == "events":
+            return [event for event in self.raw("events") if event["is_current"] == True or event["finished"] == True]
+
+        return self.raw(key)
+
+    def raw(self, key):
+        """
+        Get requested data key from the snapshot as the API served it, e.g.
+        every event of the season including those yet to start
+        """
+        if self._data is None or time.monotonic() - self._fetched_at > self.ttl:
+            self._data = get_json_data(f"{BASE_URL}/bootstrap-static/")
+            self._fetched_at = time.monotonic()
+
+        return self._data[key]
+
+    def invalidate(self):
+        """
+        Drop the cached payload so the next get refetches it
+        """
+        self._data = None
+        self._fetched_at = None
+
+def get_static_data(key, snapshot=None):
+    """
+    Get requested data key from bootstrap-static endpoint. Pass a shared
+    BootstrapSnapshot to avoid downloading the whole payload once per key
 
     Useful keys:
     - teams
@@ -18,27 +187,23 @@ def get_static_data(key):
     - element_types (player types)
     - elements_stats (map of player stats labels and column names)
     """
-    URL = "https://fantasy.premierleague.com/api/bootstrap-static/"
-    data = get_json_data(URL)
-    
-    #Keeping data till current GW (might have to change to get data only for current GW)
-    if key == "events":
-        data["events"] = [event for event in data["events"] if event["is_current"] == True or event["finished"] == True]
+    if snapshot is None:
+        snapshot = BootstrapSnapshot()
 
-    return data[key]
+    return snapshot.get(key)
 
 def get_fixtures():
     """
     Get all upcoming fixtures from the fixtures endpoint
     """
-    URL = "https://fantasy.premierleague.com/api/fixtures/"
+    URL = f"{BASE_URL}/fixtures/"
     data = get_json_data(URL)
 
     data = [fixture for fixture in data if fixture['event'] != None]
 
     for fixture in data:
         keys = fixture.keys()
-        keys_to_remove = set(keys) - set(["team_h", "team_a", "event", "id", "team_h_difficulty", "team_a_difficulty"])
+        keys_to_remove = set(keys) - set(["team_h", "team_a", "event", "id", "team_h_difficulty", "team_a_difficulty", "started"])
         for key in keys_to_remove:
             fixture.pop(key)
 
@@ -52,18 +217,105 @@ def get_player_info(element_id, key):
     - history
     - fixtures
     """
-    URL = f"https://fantasy.premierleague.com/api/element-summary/{element_id}/"
+    URL = f"{BASE_URL}/element-summary/{element_id}/"
     data = get_json_data(URL)
 
     data = data[key]
 
     return data
 
+def iter_players_info(
+    element_ids,
+    key,
+    buffer_size=64,
+    concurrency=CONCURRENCY,
+    timeout=TIMEOUT,
+    retries=RETRIES,
+    backoff=BACKOFF,
+    progress=True,
+):
+    """
+    Yield (element_id, data, error) for each player as soon as its element-summary
+    arrives, while the remaining fetches keep running on an event loop in a
+    background thread. At most `buffer_size` fetched players wait for the
+    consumer at any time, so memory stays bounded however many players there
+    are. A player whose fetch still fails after retries is yielded with the
+    exception as `error` and `data` set to None. A replay missing a player's
+    response raises CacheMiss rather than dropping the player
+    """
+    results = queue.Queue()
+    done = object()
+    loop = asyncio.new_event_loop()
+    slots = None
+
+    async def produce():
+        nonlocal slots
+        import aiohttp
+
+        slots = asyncio.Semaphore(buffer_size)
+        connector = aiohttp.TCPConnector(limit=concurrency)
+        client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+        async with aiohttp.ClientSession(
+            connector=connector, timeout=client_timeout
+        ) as session:
+            with tqdm(total=len(element_ids), disable=not progress) as pbar:
+
+                async def fetch(element_id):
+                    # Released by the consumer once it has taken the result
+                    await slots.acquire()
+                    URL = f"{BASE_URL}/element-summary/{element_id}/"
+                    try:
+                        data = await fetch_json_data(session, URL, retries, backoff)
+                        results.put((element_id, data[key], None))
+                    except (aiohttp.ClientError, asyncio.TimeoutError, KeyError, ValueError) as e:
+                        results.put((element_id, None, e))
+                    pbar.update()
+
+                await asyncio.gather(*[fetch(i) for i in element_ids])
+
+    task = loop.create_task(produce())
+
+    def run():
+        try:
+            loop.run_until_complete(task)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            results.put(e)
+        finally:
+            results.put(done)
+            loop.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = results.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+            try:
+                loop.call_soon_threadsafe(slots.release)
+            except RuntimeError:
+                # The producer has already finished and closed its loop
+                pass
+    finally:
+        # Stop outstanding fetches if the consumer gave up early
+        if thread.is_alive():
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                pass
+        thread.join()
+
 def get_manager_squad(manager_id, gw):
     """
     Get manager squad for a given gameweek
     """
-    URL = f"https://fantasy.premierleague.com/api/entry/{manager_id}/event/{gw}/picks/"
+    URL = f"{BASE_URL}/entry/{manager_id}/event/{gw}/picks/"
     data = get_json_data(URL)
     data = data["picks"]
     return data
@@ -72,7 +324,7 @@ def get_manager_info(manager_id):
     """
     Get info for a praticular manager from the entry endpoint
     """
-    URL = f"https://fantasy.premierleague.com/api/entry/{manager_id}/"
+    URL = f"{BASE_URL}/entry/{manager_id}/"
     data = get_json_data(URL)
     data.pop("leagues")
     
@@ -0,0 +1,6 @@
+-- player_gw_detailed and player_window_metrics need no extra index: their
+-- (player, round, fixture) primary keys already serve lookups and window
+-- partitions by player and round
+CREATE INDEX IF NOT EXISTS fixtures_event ON fixtures (event);
+
+CREATE INDEX IF NOT EXISTS events_is_current ON events_static (is_current);
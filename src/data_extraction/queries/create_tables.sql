@@ -151,4 +151,56 @@ CREATE TABLE IF NOT EXISTS player_gw_detailed (
     CONSTRAINT player_week_fixture PRIMARY KEY (element, round, fixture),
     FOREIGN KEY(element) REFERENCES players(id),
     FOREIGN KEY(fixture) REFERENCES fixtures(id)
-);
\ No newline at end of file
+);
+
+CREATE TABLE IF NOT EXISTS player_gw_quarantine (
+    element INTEGER,
+    payload TEXT,
+    error TEXT
+);
+
+-- Window metrics of each player_gw_detailed row, keyed like it. The gameweek
+-- and player columns are joined back on when the pages load the table
+CREATE TABLE IF NOT EXISTS player_window_metrics (
+    id INTEGER,
+    round INTEGER,
+    fixture INTEGER,
+    cumulative_points INTEGER,
+    average_bonus DOUBLE,
+    average_bps DOUBLE,
+    cumulative_assists INTEGER,
+    cumulative_clean_sheets INTEGER,
+    cumulative_goals_scored INTEGER,
+    cumulative_goals_conceded INTEGER,
+    cumulative_saves INTEGER,
+    average_influence DOUBLE,
+    average_creativity DOUBLE,
+    average_threat DOUBLE,
+    average_ict_index DOUBLE,
+    average_xa DOUBLE,
+    average_xgc DOUBLE,
+    average_xg DOUBLE,
+    average_xgi DOUBLE,
+    form DOUBLE,
+    cumulative_goal_involvements INTEGER,
+    cumulative_minutes INTEGER,
+    cumulative_xa DOUBLE,
+    cumulative_xg DOUBLE,
+    cumulative_xgi DOUBLE,
+    cumulative_xgc DOUBLE,
+    cumulative_goals_per_90 DOUBLE,
+    cumulative_assists_per_90 DOUBLE,
+    cumulative_goal_involvements_per_90 DOUBLE,
+    PRIMARY KEY (id, round, fixture)
+) WITHOUT ROWID;
+
+-- Top leaderboard_size players per position for each of leaderboard_metrics,
+-- ties broken by total points and players at zero left out
+CREATE TABLE IF NOT EXISTS player_leaderboards (
+    metric TEXT,
+    position TEXT,
+    rank INTEGER,
+    id INTEGER,
+    value DOUBLE,
+    PRIMARY KEY (metric, position, rank)
+) WITHOUT ROWID;
@@ -0,0 +1,28 @@
+INSERT INTO
+    player_leaderboards (metric, position, rank, id, value)
+SELECT
+    :metric,
+    position,
+    rank,
+    id,
+    value
+FROM
+    (
+        SELECT
+            id,
+            position,
+            {metric} AS value,
+            row_number() OVER (
+                PARTITION BY position
+                ORDER BY
+                    {metric} DESC,
+                    total_points DESC,
+                    id
+            ) AS rank
+        FROM
+            PLAYER_TABULAR_VIEW
+        WHERE
+            {metric} > 0
+    )
+WHERE
+    rank <= :size
@@ -0,0 +1,112 @@
+-- Source columns of the window metrics for every player in temp.window_refresh
+-- from their from_round onwards, plus the rows before it that the moving
+-- averages need, and the player's cumulative totals at the last materialized
+-- round before it. The parameter is the moving average window minus 2.
+WITH tail AS (
+    -- The refreshed rounds plus at least the window - 1 rows before them
+    SELECT
+        gw.*,
+        gw.round >= refresh.from_round AS is_new
+    FROM
+        -- CROSS JOIN keeps the planner from scanning the whole season first
+        temp.window_refresh refresh
+        CROSS JOIN player_gw_detailed gw ON gw.element = refresh.element
+    WHERE
+        gw.round >= COALESCE(
+            (
+                SELECT
+                    previous.round
+                FROM
+                    player_gw_detailed previous
+                WHERE
+                    previous.element = refresh.element
+                    AND previous.round < refresh.from_round
+                ORDER BY
+                    previous.round DESC
+                LIMIT
+                    1 OFFSET ?
+            ),
+            0
+        )
+),
+-- The running state is the cumulative totals of the player's last row before
+-- the refreshed rounds, in the round and fixture order the engine sums in
+state AS (
+    SELECT
+        metrics.id AS element,
+        metrics.cumulative_points,
+        metrics.cumulative_assists,
+        metrics.cumulative_clean_sheets,
+        metrics.cumulative_goals_scored,
+        metrics.cumulative_goals_conceded,
+        metrics.cumulative_saves,
+        metrics.cumulative_goal_involvements,
+        metrics.cumulative_minutes,
+        metrics.cumulative_xa,
+        metrics.cumulative_xg,
+        metrics.cumulative_xgi,
+        metrics.cumulative_xgc
+    FROM
+        temp.window_refresh refresh
+        CROSS JOIN player_window_metrics metrics ON (
+            metrics.id,
+            metrics.round,
+            metrics.fixture
+        ) = (
+            SELECT
+                previous.id,
+                previous.round,
+                previous.fixture
+            FROM
+                player_window_metrics previous
+            WHERE
+                previous.id = refresh.element
+                AND previous.round < refresh.from_round
+            ORDER BY
+                previous.round DESC,
+                previous.fixture DESC
+            LIMIT
+                1
+        )
+)
+SELECT
+    tail.element,
+    tail.round,
+    tail.fixture,
+    tail.is_new,
+    tail.assists,
+    tail.bonus,
+    tail.bps,
+    tail.clean_sheets,
+    tail.creativity,
+    tail.expected_assists,
+    tail.expected_goal_involvements,
+    tail.expected_goals,
+    tail.expected_goals_conceded,
+    tail.goals_conceded,
+    tail.goals_scored,
+    tail.ict_index,
+    tail.influence,
+    tail.minutes,
+    tail.saves,
+    tail.threat,
+    tail.total_points,
+    COALESCE(state.cumulative_points, 0) AS previous_cumulative_points,
+    COALESCE(state.cumulative_assists, 0) AS previous_cumulative_assists,
+    COALESCE(state.cumulative_clean_sheets, 0) AS previous_cumulative_clean_sheets,
+    COALESCE(state.cumulative_goals_scored, 0) AS previous_cumulative_goals_scored,
+    COALESCE(state.cumulative_goals_conceded, 0) AS previous_cumulative_goals_conceded,
+    COALESCE(state.cumulative_saves, 0) AS previous_cumulative_saves,
+    COALESCE(state.cumulative_goal_involvements, 0) AS previous_cumulative_goal_involvements,
+    COALESCE(state.cumulative_minutes, 0) AS previous_cumulative_minutes,
+    COALESCE(state.cumulative_xa, 0) AS previous_cumulative_xa,
+    COALESCE(state.cumulative_xg, 0) AS previous_cumulative_xg,
+    COALESCE(state.cumulative_xgi, 0) AS previous_cumulative_xgi,
+    COALESCE(state.cumulative_xgc, 0) AS previous_cumulative_xgc
+FROM
+    tail
+    LEFT JOIN state ON tail.element = state.element
+ORDER BY
+    tail.element,
+    tail.round,
+    tail.fixture;
@@ -0,0 +1,24 @@
+-- One season's player gameweeks for ALL_SEASONS_PLAYER_GW_VIEW, read from the
+-- database attached as {schema}
+SELECT
+    '{season}' AS season,
+    player.code,
+    gw.element AS id,
+    gw.round,
+    gw.fixture,
+    gw.total_points,
+    gw.minutes,
+    gw.goals_scored,
+    gw.assists,
+    gw.clean_sheets,
+    gw.saves,
+    gw.bonus,
+    gw.bps,
+    gw.expected_goals,
+    gw.expected_assists,
+    gw.expected_goal_involvements,
+    gw.ict_index,
+    gw.value * 1.0 / 10 AS value
+FROM
+    {schema}.player_gw_detailed gw
+    INNER JOIN {schema}.players_static player ON gw.element = player.id
@@ -0,0 +1,29 @@
+-- One season's players for ALL_SEASONS_PLAYERS_VIEW, read from the database
+-- attached as {schema}. Players keep their code from one season to the next,
+-- while their ids are renumbered every season.
+SELECT
+    '{season}' AS season,
+    player.code,
+    player.id,
+    player.web_name,
+    position.singular_name_short AS position,
+    team.short_name AS team_name,
+    player.now_cost * 1.0 / 10 AS now_cost,
+    player.total_points,
+    player.minutes,
+    player.goals_scored,
+    player.assists,
+    player.clean_sheets,
+    player.saves,
+    player.bonus,
+    player.bps,
+    player.expected_goals,
+    player.expected_assists,
+    player.expected_goal_involvements,
+    player.ict_index,
+    player.points_per_game,
+    player.value_season
+FROM
+    {schema}.players_static player
+    INNER JOIN {schema}.teams_static team ON player.team = team.id
+    INNER JOIN {schema}.positions_static position ON player.element_type = position.id
@@ -0,0 +1,66 @@
+"""
+Read-only database access for the dashboard. Each thread of a worker gets its
+own read-only DBHandler, so no connection or cursor is ever shared between
+threads. Connections are kept open and reused across requests, along with the
+prepared statements in their statement caches.
+"""
+import os
+import threading
+
+from src.data_extraction import db_handler as dbh
+
+
+class ReadOnlyPool:
+    """
+    Hands out one read-only DBHandler per thread for db_name
+    """
+
+    def __init__(self, db_name=dbh.DB_PATH):
+        self.db_name = db_name
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.handlers = []
+
+    def handler(self):
+        """
+        Returns this thread's handler. It is reconnected when the database file
+        has been replaced, e.g. by a full build, which would otherwise leave the
+        connection reading the deleted file, and in a forked worker, which must
+        not share the connection of the process it was forked from
+        """
+
+        stat = os.stat(self.db_name)
+        identity = (stat.st_dev, stat.st_ino, os.getpid())
+        handler = getattr(self.local, "handler", None)
+        if handler is not None and self.local.identity == identity:
+            return handler
+
+        if handler is not None:
+            if self.local.identity[2] == os.getpid():
+                self.discard(handler)
+            else:
+                # Left open, closing it here would affect the parent's connection
+                with self.lock:
+                    self.handlers.remove(handler)
+        handler = dbh.DBHandler(self.db_name, read_only=True)
+        self.local.handler = handler
+        self.local.identity = identity
+        with self.lock:
+            self.handlers.append(handler)
+        return handler
+
+    def discard(self, handler):
+        with self.lock:
+            self.handlers.remove(handler)
+        handler.conn.close()
+
+    def close(self):
+        """
+        Closes the calling thread's handler. The others are closed by the threads
+        that own them, as sqlite3 connections may only be used by their thread
+        """
+
+        handler = getattr(self.local, "handler", None)
+        if handler is not None:
+            self.discard(handler)
+            self.local.handler = None
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import tempfile
+
+
+class CacheMiss(Exception):
+    """
+    Raised when replaying a URL that is not in the response cache
+    """
+
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache of raw FPL API responses.
+
+    Bodies are stored once per distinct content under objects/<sha256>, and
+    each URL has a small entry under urls/ pointing at its latest body along
+    with the ETag and Last-Modified headers it was served with. In replay mode
+    no request is ever sent and every URL must already be cached
+    """
+
+    def __init__(self, cache_dir, replay=False):
+        self.cache_dir = cache_dir
+        self.replay = replay
+        os.makedirs(os.path.join(cache_dir, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(cache_dir, "urls"), exist_ok=True)
+
+    def _entry_path(self, url):
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self.cache_dir, "urls", f"{key}.json")
+
+    def _object_path(self, digest):
+        return os.path.join(self.cache_dir, "objects", digest)
+
+    def _write(self, path, data):
+        # Write then rename so concurrent readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def get_entry(self, url):
+        """
+        Returns the cached entry for a URL, or None if it was never fetched
+        """
+        try:
+            with open(self._entry_path(url), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def conditional_headers(self, url):
+        """
+        Returns If-None-Match/If-Modified-Since headers for a cached URL
+        """
+        entry = self.get_entry(url)
+        headers = {}
+        if entry is None:
+            return headers
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def load(self, url):
+        """
+        Returns the cached body of a URL, raising CacheMiss if it is not cached
+        """
+        entry = self.get_entry(url)
+        if entry is None:
+            raise CacheMiss(f"{url} is not in the response cache at {self.cache_dir}")
+        with open(self._object_path(entry["sha256"]), "rb") as f:
+            return f.read()
+
+    def store(self, url, body, headers):
+        """
+        Stores a fresh 200 response body and its validators
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        if not os.path.exists(self._object_path(digest)):
+            self._write(self._object_path(digest), body)
+        entry = {
+            "url": url,
+            "sha256": digest,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+        }
+        self._write(self._entry_path(url), json.dumps(entry).encode())
+
+    def prune(self):
+        """
+        Deletes the bodies no URL entry points at any more, left behind when a
+        URL's body changed, and returns how many were deleted
+        """
+        referenced = set()
+        for name in os.listdir(os.path.join(self.cache_dir, "urls")):
+            try:
+                with open(os.path.join(self.cache_dir, "urls", name), "r") as f:
+                    referenced.add(json.load(f)["sha256"])
+            except (FileNotFoundError, ValueError, KeyError):
+                continue
+
+        pruned = 0
+        for name in os.listdir(os.path.join(self.cache_dir, "objects")):
+            if name not in referenced:
+                os.remove(self._object_path(name))
+                pruned += 1
+        return pruned
@@ -0,0 +1,144 @@
+"""
+Columnar snapshot of the dashboard-facing views. Every build writes them as
+Arrow IPC files next to the database, which the pages memory-map instead of
+rebuilding each frame row by row from SQLite. The page cache then holds one
+copy of the files for every gunicorn worker.
+
+Each file is tagged with the database's user_version at export time, so a
+snapshot left behind by an older build is ignored rather than served stale.
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.data_extraction import window_metrics as wm
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+QUERIES = {
+    "players": "SELECT * FROM PLAYER_TABULAR_VIEW",
+    "fixtures": """
+    SELECT t.short_name as team, f.event_number, f.fixture_difficulty,
+    CASE WHEN is_home_team = 1 THEN opp.short_name||'(H)' ELSE opp.short_name||'(A)' END as opponent
+    FROM NEXT_FIVE_FIXTURES_BY_TEAM_VIEW f
+    JOIN TEAMS_STATIC opp
+    ON f.opponent_team = opp.id
+    JOIN TEAMS_STATIC t
+    on f.team_id = t.id
+    """,
+    "player_window_metrics": f"""
+    SELECT p.id, p.web_name, pos.singular_name_short AS position,
+    t.short_name AS team_name, gw.*, {", ".join(f"m.{c}" for c in wm.METRIC_COLUMNS)}
+    FROM player_window_metrics m
+    JOIN player_gw_detailed gw
+    ON gw.element = m.id AND gw.round = m.round AND gw.fixture = m.fixture
+    JOIN players_static p
+    ON m.id = p.id
+    JOIN positions_static pos
+    ON p.element_type = pos.id
+    JOIN teams_static t
+    ON p.team = t.id
+    ORDER BY m.id, m.round, m.fixture
+    """,
+    "player_leaderboards": """
+    SELECT l.metric, l.position, l.rank, l.value, p.web_name, t.short_name AS team_name
+    FROM player_leaderboards l
+    JOIN players_static p
+    ON l.id = p.id
+    JOIN teams_static t
+    ON p.team = t.id
+    ORDER BY l.metric, l.value, l.rank
+    """,
+}
+VERSION_KEY = b"db_version"
+
+
+def snapshot_dir(db_name):
+    return os.path.join(os.path.dirname(db_name), "snapshot")
+
+
+def snapshot_path(db_name, name):
+    return os.path.join(snapshot_dir(db_name), f"{name}.arrow")
+
+
+def compact_frame(df, category_ratio=0.5):
+    """
+    Returns df with integer columns downcast to the smallest type that holds
+    them, float columns as float32 where that loses nothing, and text columns
+    with few distinct values as categories
+    """
+    columns = {}
+    for column in df.columns:
+        values = df[column]
+        if pd.api.types.is_integer_dtype(values):
+            columns[column] = pd.to_numeric(values, downcast="integer")
+        elif pd.api.types.is_float_dtype(values):
+            as_float32 = values.astype("float32")
+            if np.array_equal(as_float32.astype("float64"), values, equal_nan=True):
+                columns[column] = as_float32
+        elif values.nunique() <= category_ratio * len(values):
+            columns[column] = values.astype("category")
+    return df.assign(**columns)
+
+
+def export_snapshot(conn, db_name):
+    """
+    Writes every query in QUERIES to an uncompressed Arrow IPC file tagged with
+    a new version, then sets the database's user_version to it
+    """
+    if pa is None:
+        print("pyarrow is not installed, skipping the columnar snapshot")
+        return
+
+    version = int(time.time())
+    os.makedirs(snapshot_dir(db_name), exist_ok=True)
+    for name, query in QUERIES.items():
+        table = pa.Table.from_pandas(
+            compact_frame(pd.read_sql_query(query, conn)), preserve_index=False
+        )
+        table = table.replace_schema_metadata(
+            {**table.schema.metadata, VERSION_KEY: str(version).encode()}
+        )
+        fd, tmp_path = tempfile.mkstemp(dir=snapshot_dir(db_name))
+        with os.fdopen(fd, "wb") as f:
+            with pa.ipc.new_file(f, table.schema) as writer:
+                writer.write_table(table)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, snapshot_path(db_name, name))
+    # Bumped last, so readers that see the new version find the new files
+    conn.execute(f"PRAGMA user_version = {version}")
+
+
+def read_snapshot(conn, db_name, name):
+    """
+    Memory-maps the snapshot of query `name` and returns it as a DataFrame, or
+    None when there is no snapshot matching the database's user_version
+    """
+    if pa is None:
+        return None
+    try:
+        source = pa.memory_map(snapshot_path(db_name, name))
+    except FileNotFoundError:
+        return None
+
+    reader = pa.ipc.open_file(source)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if reader.schema.metadata.get(VERSION_KEY) != str(version).encode():
+        return None
+    return reader.read_all().to_pandas(split_blocks=True)
+
+
+def load_frame(conn, db_name, name):
+    """
+    Returns query `name` from the snapshot, falling back to SQLite
+    """
+    df = read_snapshot(conn, db_name, name)
+    if df is None:
+        df = compact_frame(pd.read_sql_query(QUERIES[name], conn))
+    return df
@@ -0,0 +1,158 @@
+"""
+Vectorized engine for the cumulative and moving average metrics of
+PLAYER_WINDOW_METRICS_VIEW. Gameweek rows are scattered into a
+player x gameweek-row grid, so every metric of every player is computed in one
+pass along the rounds axis. The view stays as the SQL definition the engine is
+checked against.
+"""
+import numpy as np
+
+# (column, kind, source column, decimals) in the order of PLAYER_WINDOW_METRICS_VIEW.
+# Cumulative columns with decimals=None are integer sums and are not rounded.
+CUMULATIVE = "cumulative"
+MOVING = "moving"
+METRICS = [
+    ("cumulative_points", CUMULATIVE, "total_points", None),
+    ("average_bonus", MOVING, "bonus", 1),
+    ("average_bps", MOVING, "bps", 1),
+    ("cumulative_assists", CUMULATIVE, "assists", None),
+    ("cumulative_clean_sheets", CUMULATIVE, "clean_sheets", None),
+    ("cumulative_goals_scored", CUMULATIVE, "goals_scored", None),
+    ("cumulative_goals_conceded", CUMULATIVE, "goals_conceded", None),
+    ("cumulative_saves", CUMULATIVE, "saves", None),
+    ("average_influence", MOVING, "influence", 1),
+    ("average_creativity", MOVING, "creativity", 1),
+    ("average_threat", MOVING, "threat", 1),
+    ("average_ict_index", MOVING, "ict_index", 1),
+    ("average_xa", MOVING, "expected_assists", 2),
+    ("average_xgc", MOVING, "expected_goals_conceded", 2),
+    ("average_xg", MOVING, "expected_goals", 2),
+    ("average_xgi", MOVING, "expected_goal_involvements", 2),
+    ("form", MOVING, "total_points", 1),
+    ("cumulative_goal_involvements", CUMULATIVE, "goal_involvements", None),
+    ("cumulative_minutes", CUMULATIVE, "minutes", None),
+    ("cumulative_xa", CUMULATIVE, "expected_assists", 2),
+    ("cumulative_xg", CUMULATIVE, "expected_goals", 2),
+    ("cumulative_xgi", CUMULATIVE, "expected_goal_involvements", 2),
+    ("cumulative_xgc", CUMULATIVE, "expected_goals_conceded", 2),
+]
+PER_90 = [
+    ("cumulative_goals_per_90", "cumulative_goals_scored"),
+    ("cumulative_assists_per_90", "cumulative_assists"),
+    ("cumulative_goal_involvements_per_90", "cumulative_goal_involvements"),
+]
+CUMULATIVE_COLUMNS = [column for column, kind, *_ in METRICS if kind == CUMULATIVE]
+METRIC_COLUMNS = [column for column, *_ in METRICS] + [column for column, _ in PER_90]
+SOURCE_COLUMNS = sorted(
+    {source for _, _, source, _ in METRICS if source != "goal_involvements"}
+    | {"goals_scored", "assists"}
+)
+
+
+def sql_round(values, decimals):
+    """
+    Rounds like SQLite's ROUND(), rather than NumPy's round half to even. SQLite
+    adds half a unit plus a 3e-16 relative nudge in extended precision, then
+    truncates. That only changes the result near a tie, so only those values
+    take the slow extended precision path
+    """
+    magnitude = np.abs(values)
+    scaled = np.floor(magnitude * 10**decimals + 0.5)
+    fraction = magnitude * 10**decimals % 1
+    near_tie = np.abs(fraction - 0.5) < 1e-6
+    if near_tie.any():
+        tie = magnitude[near_tie].astype(np.longdouble)
+        rounder = np.longdouble(0.5)
+        for _ in range(decimals):
+            rounder *= np.longdouble(0.1)
+        # The nudge only applies while the printed digits stay within 15
+        exponent = np.frexp(magnitude[near_tie])[1] - 1
+        exponent = np.where(tie == 0, -1023, exponent)
+        nudge = np.where(decimals + np.fix(exponent / 3) < 15, tie * 3e-16, 0)
+        scaled[near_tie] = np.floor((tie + (rounder + nudge)) * 10**decimals)
+    return np.copysign(scaled / 10**decimals, values)
+
+
+def player_slots(elements):
+    """
+    Returns each row's player index and its position among that player's rows,
+    for rows sorted by element
+    """
+    first = np.ones(len(elements), dtype=bool)
+    first[1:] = elements[1:] != elements[:-1]
+    player = np.cumsum(first) - 1
+    slot = np.arange(len(elements)) - np.flatnonzero(first)[player]
+    return player, slot
+
+
+def compute_window_metrics(elements, sources, window=5, is_new=None, state=None):
+    """
+    Computes every column of METRIC_COLUMNS for gameweek rows sorted by element,
+    round and fixture. `sources` maps each of SOURCE_COLUMNS to an array over
+    those rows.
+
+    When refreshing, is_new marks the rows to compute and state maps each of
+    CUMULATIVE_COLUMNS to the row's player's running total before them. Older
+    rows only feed the moving averages, so they must include the window - 1
+    rows before each player's first new row. Returns arrays over the new rows
+    """
+    elements = np.asarray(elements)
+    if is_new is None:
+        is_new = np.ones(len(elements), dtype=bool)
+    player, slot = player_slots(elements)
+    shape = (player[-1] + 1, slot.max() + 1) if len(elements) else (0, 0)
+
+    sources = dict(sources)
+    sources["goal_involvements"] = np.asarray(sources["goals_scored"]) + np.asarray(
+        sources["assists"]
+    )
+    metrics = {}
+
+    cumulative = [
+        (column, source) for column, kind, source, _ in METRICS if kind == CUMULATIVE
+    ]
+    for dtype in [np.int64, np.float64]:
+        group = [
+            (column, source)
+            for column, source in cumulative
+            if np.asarray(sources[source]).dtype.kind == np.dtype(dtype).kind
+        ]
+        if not group:
+            continue
+        grid = np.zeros((len(group),) + shape, dtype=dtype)
+        grid[:, player, slot] = [
+            np.where(is_new, sources[source], 0) for _, source in group
+        ]
+        totals = np.cumsum(grid, axis=2)[:, player, slot]
+        for (column, _), total in zip(group, totals):
+            if state is not None:
+                total = total + np.asarray(state[column], dtype=dtype)
+            metrics[column] = total
+
+    # The moving sums add the newest row and drop the one leaving the window in
+    # the same order as SQLite, so rounding sees bit-identical averages
+    moving = [(column, source) for column, kind, source, _ in METRICS if kind == MOVING]
+    grid = np.zeros((len(moving),) + shape)
+    grid[:, player, slot] = [sources[source] for _, source in moving]
+    sums = np.zeros_like(grid)
+    running = np.zeros(grid.shape[:2])
+    for k in range(shape[1]):
+        running = running + grid[:, :, k]
+        if k >= window:
+            running = running - grid[:, :, k - window]
+        sums[:, :, k] = running
+    averages = sums[:, player, slot] / np.minimum(slot + 1, window)
+    for (column, _), average in zip(moving, averages):
+        metrics[column] = average
+
+    for column, _, _, decimals in METRICS:
+        metrics[column] = metrics[column][is_new]
+        if decimals is not None:
+            metrics[column] = sql_round(metrics[column], decimals)
+
+    minutes = metrics["cumulative_minutes"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for column, total in PER_90:
+            per_90 = metrics[total] * 1.0 / minutes * 90
+            metrics[column] = np.where(minutes == 0, np.nan, sql_round(per_90, 2))
+    return metrics
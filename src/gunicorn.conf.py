@@ -0,0 +1,21 @@
+"""
+Gunicorn settings, read from the src directory that `gunicorn --chdir src`
+runs in.
+
+The app and its data are loaded once in the master process, so the workers
+forked from it share the frames copy-on-write instead of each loading its own
+copy. A worker that reloads after the database changes holds its own copy
+until the next restart.
+"""
+import gc
+
+preload_app = True
+
+
+def when_ready(server):
+    from src.utils.data_store import store
+
+    store.get()
+    # Keeps the garbage collector from writing to, and so copying, the pages
+    # of every object loaded so far in each worker
+    gc.freeze()
@@ -1,46 +1,49 @@
 import dash
 from dash import Dash, dcc, html, dash_table, Input, Output
 import dash_bootstrap_components as dbc
-import pandas as pd
-from yaml import safe_load
-from src.data_extraction import db_handler as dbh
-import plotly.express as px
+from src.utils.app_config import config
+from src.utils.data_store import store
+from src.utils.callback_cache import memoize
 
 dash.register_page(__name__, name="Home", path="/")
 
-layout = html.Div(
-    [
-        html.H2(id="current-gw", style={"text-align": "center"}),
-        dbc.Row(
-            [
-                dbc.Col(
-                    [html.H5("View top performers by", style={"text-align": "center"})],
-                    width=2,
-                    style={"margin": "5px -40px 0 5px"},
-                ),
-                dbc.Col(
-                    [
-                        dcc.Dropdown(
-                            id="top-performers-dropdown",
-                            options=["Gameweek", "Season"],
-                            value="Gameweek",
-                            clearable=False,
-                        ),
-                    ],
-                    width=2,
-                ),
-                dcc.Graph(id="top-performers-graph"),
-            ]
-        ),
-    ],
-)
+
+def layout():
+    return html.Div(
+        [
+            html.H2(id="current-gw", style={"text-align": "center"}),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        [
+                            html.H5(
+                                "View top performers by", style={"text-align": "center"}
+                            )
+                        ],
+                        width=2,
+                        style={"margin": "5px -40px 0 5px"},
+                    ),
+                    dbc.Col(
+                        [
+                            dcc.Dropdown(
+                                id="top-performers-dropdown",
+                                options=config.leaderboard_options,
+                                value="event_points",
+                                clearable=False,
+                            ),
+                        ],
+                        width=2,
+                    ),
+                    dcc.Graph(id="top-performers-graph"),
+                ]
+            ),
+        ],
+    )
 
 
 @dash.callback(Output("current-gw", "children"), Input("current-gw", "n_clicks"))
 def update_current_gw(placeholder):
-    db = dbh.DBHandler()
-    current_gw = pd.read_sql_query("SELECT * FROM current_gw_view", db.conn).iloc[0, 0]
-    db.conn.close()
+    current_gw = store.get()["current_gw"]
 
     return f"Current Gameweek:{current_gw}"
 
@@ -48,38 +51,31 @@ def update_current_gw(placeholder):
 @dash.callback(
     Output("top-performers-graph", "figure"), Input("top-performers-dropdown", "value")
 )
-def top_players_graph(value):
-    db = dbh.DBHandler()
-    if value == "Gameweek":
-        score_var = "event_points"
-    elif value == "Season":
-        score_var = "total_points"
+@memoize
+def top_players_graph(metric):
+    # Imported on first use, it is the slowest import of the pages and no
+    # other figure needs it
+    import plotly.express as px
+    import plotly.graph_objects as go
 
-    current_gw = pd.read_sql_query("SELECT * FROM current_gw_view", db.conn).iloc[0, 0]
-    df = pd.read_sql_query(
-        f"""
-            SELECT id, web_name, position, team_name, {score_var}
-            FROM  (
-                SELECT 
-                    id, web_name, position, team_name, {score_var},
-                    rank() OVER (PARTITION BY position ORDER BY {score_var} DESC) AS rank
-                FROM 
-                    player_tabular_view
-                )
-            WHERE 
-                rank <= 5
-            ORDER BY
-                rank
-        """,
-        db.conn,
-    )
-    db.conn.close()
+    df = store.get()["player_leaderboards"][metric]
+    title = f"Top performers by {config.static_column_names[metric]}"
+    if df.empty:
+        fig = go.Figure(layout={"title": title, "height": 500})
+        fig.add_annotation(
+            text="No player has a positive value yet",
+            showarrow=False,
+            xref="paper",
+            yref="paper",
+        )
+        fig.update_xaxes(visible=False)
+        fig.update_yaxes(visible=False)
+        return fig
 
-    config = load_config()
     fig = px.bar(
-        data_frame=df.sort_values(by=score_var, ascending=True),
+        data_frame=df,
         y="web_name",
-        x=score_var,
+        x="value",
         facet_col="position",
         facet_col_wrap=2,
         facet_col_spacing=0.1,
@@ -88,10 +84,10 @@ def top_players_graph(value):
         orientation="h",
         labels={
             "web_name": "Player",
-            score_var: config["static_column_names"][score_var],
+            "value": config.static_column_names[metric],
             "team_name": "Team",
         },
-        title=f"Top performers this {value.lower()}",
+        title=title,
         height=500,
         category_orders={"position": ["GKP", "DEF", "MID", "FWD"]},
     )
@@ -99,9 +95,3 @@ def top_players_graph(value):
     fig.for_each_annotation(lambda t: t.update(text=t.text.split("=")[-1]))
     fig.update_yaxes(matches=None, showticklabels=True, title=None)
     return fig
-
-
-def load_config():
-    with open("utils/config.yml", "r") as f:
-        config = safe_load(f)
-    return config
@@ -1,24 +1,25 @@
 import dash
-from dash import Dash, dcc, html, dash_table as dt, Input, Output
+from dash import (
+    Dash,
+    dcc,
+    html,
+    dash_table as dt,
+    Input,
+    Output,
+    State,
+    ClientsideFunction,
+)
 import dash_bootstrap_components as dbc
-import plotly.express as px
-from yaml import safe_load
 
-from src.data_extraction import db_handler as dbh
 from src.utils import data_table_module as dtm
-
-db = dbh.DBHandler()
+from src.utils import figures
+from src.utils.app_config import config
+from src.utils.data_store import store
+from src.utils.callback_cache import memoize
 
 dash.register_page(__name__, name="Player Overall Statistics")
 
-with open("utils/config.yml", "r") as yaml_file:
-    config = safe_load(yaml_file)
-
-fixtures_flat = dtm.load_fixtures(db)
-players = dtm.load_players(db)
-
-df = players.merge(fixtures_flat, how="inner", left_on="team_name", right_on="team")
-df = dtm.format_name_by_availability(df)
+PAGE_SIZE = 15
 
 
 # styles_fixtures = dtm.discrete_background_color_bins(
@@ -40,195 +41,144 @@ df = dtm.format_name_by_availability(df)
 #     reverse=True,
 # )
 
-layout = html.Div(
-    [
-        dbc.Row(
-            [
-                dbc.Col(
-                    dbc.Row(
+
+def layout():
+    data = store.get()
+    df = data["player_table"]
+    return html.Div(
+        [
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dbc.Row(
+                            [
+                                dbc.Col(
+                                    [
+                                        html.H5("X-axis"),
+                                        dcc.Dropdown(
+                                            id="x_axis",
+                                            options=config.axis_options,
+                                            value="expected_goal_involvements",
+                                            clearable=False,
+                                        ),
+                                    ]
+                                ),
+                                dbc.Col(
+                                    [
+                                        html.H5("Y-axis"),
+                                        dcc.Dropdown(
+                                            id="y_axis",
+                                            options=config.axis_options,
+                                            value="goal_involvements",
+                                            clearable=False,
+                                        ),
+                                    ]
+                                ),
+                                dbc.Col(
+                                    [
+                                        html.H5("Size"),
+                                        dcc.Dropdown(
+                                            id="bubble_size",
+                                            options=config.size_options,
+                                            value="form",
+                                        ),
+                                    ]
+                                ),
+                                dcc.Graph(id="scatter"),
+                                dt.DataTable(
+                                    id="player_table",
+                                    page_action="custom",
+                                    page_current=0,
+                                    page_size=PAGE_SIZE,
+                                    style_table={
+                                        "overflowX": "auto",
+                                        "minWidth": "100%",
+                                    },
+                                    sort_action="custom",
+                                    sort_mode="single",
+                                    sort_by=[],
+                                    fixed_columns={"headers": True, "data": 3},
+                                    style_cell={
+                                        "minWidth": "150px",
+                                        "maxWidth": "180px",
+                                    },
+                                    # style_data_conditional=styles_fixtures,
+                                    style_header={
+                                        "backgroundColor": "#f1f6ff",
+                                        "fontWeight": "bold",
+                                    },
+                                    columns=config.table_columns,
+                                    css=[
+                                        {
+                                            "selector": ".show-hide",
+                                            "rule": "display: none",
+                                        }
+                                    ],
+                                ),
+                                dcc.Store(id="player_table_store"),
+                            ]
+                        ),
+                        width=10,
+                        style={"border": "1px solid #f1f6ff", "padding": "5px"},
+                    ),
+                    dbc.Col(
                         [
-                            dbc.Col(
-                                [
-                                    html.H5("X-axis"),
-                                    dcc.Dropdown(
-                                        id="x_axis",
-                                        options=[
-                                            {
-                                                "label": config["static_column_names"][
-                                                    i
-                                                ],
-                                                "value": i,
-                                            }
-                                            for i in config[
-                                                "static_column_names"
-                                            ].keys()
-                                            if i
-                                            not in [
-                                                "web_name",
-                                                "team_name",
-                                                "position",
-                                                "opponent_1",
-                                                "opponent_2",
-                                                "opponent_3",
-                                                "opponent_4",
-                                                "opponent_5",
-                                            ]
-                                        ],
-                                        value="expected_goal_involvements",
-                                        clearable=False,
-                                    ),
-                                ]
+                            html.H5("Position"),
+                            dcc.Dropdown(
+                                id="position_dropdown",
+                                options=data["positions"],
+                                placeholder="All",
                             ),
-                            dbc.Col(
-                                [
-                                    html.H5("Y-axis"),
-                                    dcc.Dropdown(
-                                        id="y_axis",
-                                        options=[
-                                            {
-                                                "label": config["static_column_names"][
-                                                    i
-                                                ],
-                                                "value": i,
-                                            }
-                                            for i in config[
-                                                "static_column_names"
-                                            ].keys()
-                                            if i
-                                            not in [
-                                                "web_name",
-                                                "team_name",
-                                                "position",
-                                                "opponent_1",
-                                                "opponent_2",
-                                                "opponent_3",
-                                                "opponent_4",
-                                                "opponent_5",
-                                            ]
-                                        ],
-                                        value="goal_involvements",
-                                        clearable=False,
-                                    ),
-                                ]
+                            html.H5("Team"),
+                            dcc.Dropdown(
+                                id="team_dropdown",
+                                options=data["teams"],
+                                placeholder="All",
+                                multi=True,
                             ),
-                            dbc.Col(
-                                [
-                                    html.H5("Size"),
-                                    dcc.Dropdown(
-                                        id="bubble_size",
-                                        options=[
-                                            {
-                                                "label": config["static_column_names"][
-                                                    i
-                                                ],
-                                                "value": i,
-                                            }
-                                            for i in config[
-                                                "static_column_names"
-                                            ].keys()
-                                            if i
-                                            not in ["web_name", "team_name", "position"]
-                                        ],
-                                        value="form",
-                                    ),
-                                ]
-                            ),
-                            dcc.Graph(id="scatter"),
-                            dt.DataTable(
-                                df.to_dict("records"),
-                                id="player_table",
-                                page_size=15,
-                                style_table={
-                                    "overflowX": "auto",
-                                    "minWidth": "100%",
-                                },
-                                sort_action="native",
-                                sort_mode="single",
-                                fixed_columns={"headers": True, "data": 3},
-                                style_cell={"minWidth": "150px", "maxWidth": "180px"},
-                                # style_data_conditional=styles_fixtures,
-                                style_header={
-                                    "backgroundColor": "#f1f6ff",
-                                    "fontWeight": "bold",
+                            html.H5("Minutes Played"),
+                            dcc.RangeSlider(
+                                id="minutes_played_slider",
+                                min=0,
+                                max=df.minutes.max(),
+                                value=[0, df.minutes.max()],
+                                marks=None,
+                                tooltip={
+                                    "always_visible": True,
+                                    "placement": "bottom",
                                 },
-                                columns=[
-                                    {
-                                        "name": config["static_column_names"][i],
-                                        "id": i,
-                                    }
-                                    for i in config["static_column_names"].keys()
-                                ],
-                                css=[
-                                    {"selector": ".show-hide", "rule": "display: none"}
-                                ],
                             ),
-                        ]
-                    ),
-                    width=10,
-                    style={"border": "1px solid #f1f6ff", "padding": "5px"},
-                ),
-                dbc.Col(
-                    [
-                        html.H5("Position"),
-                        dcc.Dropdown(
-                            id="position_dropdown",
-                            options=db.get_unique_values_in_table_column(
-                                "positions_static", "singular_name_short"
+                            html.H5("Price Range"),
+                            dcc.RangeSlider(
+                                id="price_range_slider",
+                                min=df.now_cost.min(),
+                                max=df.now_cost.max(),
+                                value=[df.now_cost.min(), df.now_cost.max()],
+                                step=0.1,
+                                marks=None,
+                                tooltip={
+                                    "always_visible": True,
+                                    "placement": "bottom",
+                                },
                             ),
-                            placeholder="All",
-                        ),
-                        html.H5("Team"),
-                        dcc.Dropdown(
-                            id="team_dropdown",
-                            options=db.get_unique_values_in_table_column(
-                                "teams_static", "short_name"
+                            dbc.Button(
+                                "Reset Filters",
+                                id="reset_button",
+                                color="danger",
+                                style={"margin-top": "5px"},
                             ),
-                            placeholder="All",
-                            multi=True,
-                        ),
-                        html.H5("Minutes Played"),
-                        dcc.RangeSlider(
-                            id="minutes_played_slider",
-                            min=0,
-                            max=df.minutes.max(),
-                            value=[0, df.minutes.max()],
-                            marks=None,
-                            tooltip={
-                                "always_visible": True,
-                                "placement": "bottom",
-                            },
-                        ),
-                        html.H5("Price Range"),
-                        dcc.RangeSlider(
-                            id="price_range_slider",
-                            min=df.now_cost.min(),
-                            max=df.now_cost.max(),
-                            value=[df.now_cost.min(), df.now_cost.max()],
-                            step=0.1,
-                            marks=None,
-                            tooltip={
-                                "always_visible": True,
-                                "placement": "bottom",
-                            },
-                        ),
-                        dbc.Button(
-                            "Reset Filters",
-                            id="reset_button",
-                            color="danger",
-                            style={"margin-top": "5px"},
-                        ),
-                    ],
-                    width=2,
-                    style={
-                        "border": "1px solid #f1f6ff",
-                        "padding": "5px",
-                    },
-                ),
-            ],
-            style={"padding": "10px"},
-        ),
-    ]
-)
+                        ],
+                        width=2,
+                        style={
+                            "border": "1px solid #f1f6ff",
+                            "padding": "5px",
+                        },
+                    ),
+                ],
+                style={"padding": "10px"},
+            ),
+        ]
+    )
 
 
 @dash.callback(
@@ -241,6 +191,7 @@ layout = html.Div(
     Input("minutes_played_slider", "value"),
     Input("price_range_slider", "value"),
 )
+@memoize
 def update_scatter(
     x_axis,
     y_axis,
@@ -258,83 +209,168 @@ def update_scatter(
     )
     if bubble_size:
         dff = dff[dff[bubble_size] >= 0]
-    dff["id"] = dff["id"].astype(str)
-    fig = px.scatter(
+    fig = figures.player_scatter(
         dff,
         x=x_axis,
         y=y_axis,
-        color="id",
         size=bubble_size,
-        labels=config["static_column_names"] | {"id": "Player ID", "web_name": "Name", "team_name": "Team", "position": "Position"},
-        hover_data=['web_name', 'team_name', 'position']
+        labels=config.static_column_names,
+        title=f"{config.static_column_names[y_axis]} by {config.static_column_names[x_axis]}",
     )
-    fig.update_layout(
-        title=f"{config['static_column_names'][y_axis]} by {config['static_column_names'][x_axis]}",
-        xaxis_title=config["static_column_names"][x_axis],
-        yaxis_title=config["static_column_names"][y_axis],
+
+    return fig
+
+
+if config.player_table_mode == "client":
+    # The filtered players are sent once per filter change, then zooming,
+    # sorting and paging run in the browser, see assets/player_table.js
+    @dash.callback(
+        Output("player_table_store", "data"),
+        Output("player_table", "hidden_columns"),
+        Input("position_dropdown", "value"),
+        Input("team_dropdown", "value"),
+        Input("minutes_played_slider", "value"),
+        Input("price_range_slider", "value"),
+        Input("x_axis", "value"),
+        Input("y_axis", "value"),
     )
-    fig.for_each_trace(
-        lambda t: t.update(
-            name=dff.loc[dff.id.astype(str) == t.name, "web_name"].iloc[0]
+    @memoize
+    def update_player_table_store(
+        position_dropdown_value,
+        team_dropdown_value,
+        minutes_played_slider_value,
+        price_range_slider_value,
+        x_axis,
+        y_axis,
+    ):
+        data = store.get()
+        # Cached by the index, so the scatter and the table share one selection
+        mask = data["player_table_filter"].select(
+            position_dropdown_value,
+            team_dropdown_value,
+            minutes_played_slider_value,
+            price_range_slider_value,
+        )
+        hide_cols = config.hidden_columns[position_dropdown_value]
+        columns = config.visible_columns[position_dropdown_value]
+        # The axes are sent along for the zoom filter even when they are hidden
+        values = dtm.columnar_data(
+            data["player_table"], mask, list(dict.fromkeys(columns + [x_axis, y_axis]))
+        )
+        return (
+            {"values": values, "columns": columns, "x_axis": x_axis, "y_axis": y_axis},
+            hide_cols,
         )
-    )
-    fig.for_each_trace(
-        lambda t: t.update(showlegend=False if t.marker.size == [0] else True)
-    )
 
-    return fig
+    dash.clientside_callback(
+        ClientsideFunction(namespace="player_table", function_name="page"),
+        Output("player_table", "data"),
+        Output("player_table", "sort_by"),
+        Output("player_table", "page_current"),
+        Output("player_table", "page_count"),
+        Input("player_table_store", "data"),
+        Input("scatter", "relayoutData"),
+        Input("player_table", "page_current"),
+        Input("player_table", "sort_by"),
+        State("player_table", "page_size"),
+    )
 
+else:
 
-@dash.callback(
-    Output("player_table", "data"),
-    Output("player_table", "hidden_columns"),
-    Output("player_table", "sort_by"),
-    Input("position_dropdown", "value"),
-    Input("team_dropdown", "value"),
-    Input("minutes_played_slider", "value"),
-    Input("price_range_slider", "value"),
-    Input("scatter", "relayoutData"),
-    Input("x_axis", "value"),
-    Input("y_axis", "value"),
-)
-def update_player_table(
-    position_dropdown_value,
-    team_dropdown_value,
-    minutes_played_slider_value,
-    price_range_slider_value,
-    relayoutData,
-    x_axis,
-    y_axis,
-):
+    @dash.callback(
+        Output("player_table", "data"),
+        Output("player_table", "hidden_columns"),
+        Output("player_table", "sort_by"),
+        Output("player_table", "page_current"),
+        Output("player_table", "page_count"),
+        Input("position_dropdown", "value"),
+        Input("team_dropdown", "value"),
+        Input("minutes_played_slider", "value"),
+        Input("price_range_slider", "value"),
+        Input("scatter", "relayoutData"),
+        Input("x_axis", "value"),
+        Input("y_axis", "value"),
+        Input("player_table", "page_current"),
+        Input("player_table", "sort_by"),
+    )
+    def update_player_table(
+        position_dropdown_value,
+        team_dropdown_value,
+        minutes_played_slider_value,
+        price_range_slider_value,
+        relayoutData,
+        x_axis,
+        y_axis,
+        page_current,
+        sort_by,
+    ):
+        # Any change other than paging or sorting starts again from the first page,
+        # sorted by the y-axis
+        triggered = dash.ctx.triggered_prop_ids
+        if "player_table.page_current" not in triggered:
+            page_current = 0
+            if "player_table.sort_by" not in triggered:
+                sort_by = [{"column_id": y_axis, "direction": "desc"}]
+        return player_table_page(
+            position_dropdown_value,
+            team_dropdown_value,
+            minutes_played_slider_value,
+            price_range_slider_value,
+            relayoutData,
+            x_axis,
+            y_axis,
+            page_current,
+            sort_by,
+        )
 
-    dff = filter_df(
+    @memoize
+    def player_table_page(
         position_dropdown_value,
         team_dropdown_value,
         minutes_played_slider_value,
         price_range_slider_value,
-    )
-    if relayoutData and "xaxis.range[0]" in relayoutData:
-        # Filtering dataframe based on current zoom
-        dff = dff[
-            (dff[x_axis] >= relayoutData["xaxis.range[0]"])
-            & (dff[x_axis] <= relayoutData["xaxis.range[1]"])
-        ]
-    if relayoutData and "yaxis.range[0]" in relayoutData:
-        dff = dff[
-            (dff[y_axis] >= relayoutData["yaxis.range[0]"])
-            & (dff[y_axis] <= relayoutData["yaxis.range[1]"])
-        ]
-    hide_cols = config["all_players_hidden_columns"]
-    if position_dropdown_value != None:
-        hide_cols = (
-            hide_cols + config[str.lower(position_dropdown_value) + "_hidden_columns"]
+        relayoutData,
+        x_axis,
+        y_axis,
+        page_current,
+        sort_by,
+    ):
+        data = store.get()
+        df = data["player_table"]
+        # Cached by the index, so the scatter and the table share one selection
+        mask = data["player_table_filter"].select(
+            position_dropdown_value,
+            team_dropdown_value,
+            minutes_played_slider_value,
+            price_range_slider_value,
+        )
+        if relayoutData and "xaxis.range[0]" in relayoutData:
+            # Filtering dataframe based on current zoom
+            mask = (
+                mask
+                & (df[x_axis] >= relayoutData["xaxis.range[0]"]).to_numpy()
+                & (df[x_axis] <= relayoutData["xaxis.range[1]"]).to_numpy()
+            )
+        if relayoutData and "yaxis.range[0]" in relayoutData:
+            mask = (
+                mask
+                & (df[y_axis] >= relayoutData["yaxis.range[0]"]).to_numpy()
+                & (df[y_axis] <= relayoutData["yaxis.range[1]"]).to_numpy()
+            )
+        hide_cols = config.hidden_columns[position_dropdown_value]
+        # Hidden columns are left out of the data sent to the browser
+        columns = config.visible_columns[position_dropdown_value]
+        records, page_count = dtm.page_records(
+            df,
+            data["player_table_orders"],
+            mask,
+            sort_by,
+            page_current,
+            PAGE_SIZE,
+            columns,
         )
 
-    return (
-        dff.to_dict("records"),
-        hide_cols,
-        [{"column_id": y_axis, "direction": "desc"}],
-    )
+        return records, hide_cols, sort_by, page_current, page_count
 
 
 def filter_df(
@@ -343,20 +379,14 @@ def filter_df(
     minutes_played_slider_value,
     price_range_slider_value,
 ):
-    dff = df.copy()
-    if position_dropdown_value != None:
-        dff = dff[dff.position == position_dropdown_value]
-    if team_dropdown_value != [] and team_dropdown_value != None:
-        dff = dff[dff.team_name.isin(team_dropdown_value)]
-    dff = dff[
-        (dff.minutes >= minutes_played_slider_value[0])
-        & (dff.minutes <= minutes_played_slider_value[1])
-    ]
-    dff = dff[
-        (dff.now_cost >= price_range_slider_value[0])
-        & (dff.now_cost <= price_range_slider_value[1])
-    ]
-    return dff
+    data = store.get()
+    mask = data["player_table_filter"].select(
+        position_dropdown_value,
+        team_dropdown_value,
+        minutes_played_slider_value,
+        price_range_slider_value,
+    )
+    return data["player_table"].iloc[mask.nonzero()[0]]
 
 
 @dash.callback(
@@ -368,6 +398,7 @@ def filter_df(
     Input("reset_button", "n_clicks"),
 )
 def reset_filters(n_clicks):
+    df = store.get()["player_table"]
     return (
         None,
         [],
@@ -0,0 +1,79 @@
+"""
+Settings of the dashboard from utils/config.yml, parsed once when the app
+starts rather than by every page, together with the dropdown options and
+table columns the page layouts build from them.
+"""
+from src.data_extraction import db_handler as dbh
+
+POSITIONS = ["GKP", "DEF", "MID", "FWD"]
+PLAYER_TABLE_MODES = ["client", "server"]
+# Columns of the players table left out of the scatter's size options, and
+# together with the fixtures out of its axis options
+PLAYER_COLUMNS = ["web_name", "team_name", "position"]
+FIXTURE_COLUMNS = [f"opponent_{i}" for i in range(1, 6)]
+
+
+def options(names, keys=None):
+    """
+    Dropdown options labelled by names for keys, every key of names by default
+    """
+    return [{"label": names[key], "value": key} for key in keys or names]
+
+
+class AppConfig:
+    """
+    Typed view of a parsed config.yml
+    """
+
+    def __init__(self, raw):
+        self.static_column_names = dict(raw["static_column_names"])
+        self.gw_column_names = dict(raw["gw_column_names"])
+        self.moving_average_window = int(raw["moving_average_window"])
+        self.leaderboard_metrics = list(raw["leaderboard_metrics"])
+        self.player_table_mode = raw["player_table_mode"]
+        if self.player_table_mode not in PLAYER_TABLE_MODES:
+            raise ValueError(f"Unknown player_table_mode {self.player_table_mode}")
+        self.callback_cache_size = int(raw["callback_cache_size"])
+        self.callback_cache_disk = bool(raw["callback_cache_disk"])
+        self.metrics_enabled = bool(raw.get("metrics_enabled", False))
+
+        self.hidden_columns = {None: list(raw["all_players_hidden_columns"])}
+        for position in POSITIONS:
+            self.hidden_columns[position] = self.hidden_columns[None] + list(
+                raw[f"{position.lower()}_hidden_columns"]
+            )
+        self.visible_columns = {
+            position: [
+                column for column in self.static_column_names if column not in hidden
+            ]
+            for position, hidden in self.hidden_columns.items()
+        }
+
+        self.gw_labels = self.gw_column_names | {"round": "Gameweek"}
+        self.leaderboard_options = options(
+            self.static_column_names, self.leaderboard_metrics
+        )
+        self.gw_metric_options = options(self.gw_column_names)
+        self.axis_options = options(
+            self.static_column_names,
+            [
+                column
+                for column in self.static_column_names
+                if column not in PLAYER_COLUMNS + FIXTURE_COLUMNS
+            ],
+        )
+        self.size_options = options(
+            self.static_column_names,
+            [
+                column
+                for column in self.static_column_names
+                if column not in PLAYER_COLUMNS
+            ],
+        )
+        self.table_columns = [
+            {"name": name, "id": column}
+            for column, name in self.static_column_names.items()
+        ]
+
+
+config = AppConfig(dbh.load_config())
@@ -0,0 +1,184 @@
+"""
+Memoized dashboard callback outputs. Most users ask for the same default views,
+so each output is kept under the callback's name, its inputs and the version
+of the data it was computed from. A reload of the data changes the version,
+which retires every entry of the previous one.
+
+Entries live in a bounded in-process LRU and, when enabled, in files under
+data/callback_cache shared by all gunicorn workers.
+"""
+import functools
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+from src.data_extraction import db_handler as dbh
+from src.utils.app_config import config
+from src.utils.data_store import store
+from src.utils.metrics import metrics
+
+# Returned by read_disk for outputs not on disk, as None is a valid output
+MISSING = object()
+
+
+class CallbackCache:
+    """
+    LRU of up to size callback outputs, backed by a directory of pickled
+    outputs per data version if disk_dir is set
+    """
+
+    def __init__(self, data_store=store, size=256, disk_dir=None):
+        self.data_store = data_store
+        self.size = size
+        self.disk_dir = disk_dir
+        self.enabled = True
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.version = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "entries": len(self.entries),
+        }
+
+    def key(self, name, args):
+        # Inputs are normalized through JSON, so equal values hash the same
+        # whichever request they came from
+        self.data_store.get()
+        inputs = json.dumps(args, sort_keys=True, default=str)
+        return self.data_store.file_hash, name, inputs
+
+    def disk_path(self, key):
+        version, name, inputs = key
+        digest = hashlib.sha256(f"{name}\0{inputs}".encode()).hexdigest()
+        return os.path.join(self.disk_dir, version, f"{digest}.pkl")
+
+    def read_disk(self, key):
+        try:
+            with open(self.disk_path(key), "rb") as f:
+                return pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return MISSING
+
+    def write_disk(self, key, output):
+        path = self.disk_path(key)
+        version_dir = os.path.dirname(path)
+        # Another worker may prune the directory at any time, in which case the
+        # output is only kept in memory
+        try:
+            os.makedirs(version_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=version_dir)
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(output, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    def prune_disk(self, version):
+        """
+        Deletes the disk entries of every data version but version
+        """
+        if not self.disk_dir or not os.path.isdir(self.disk_dir):
+            return
+        for entry in os.listdir(self.disk_dir):
+            if entry != version:
+                shutil.rmtree(os.path.join(self.disk_dir, entry), ignore_errors=True)
+
+    def put(self, key, output):
+        with self.lock:
+            if key[0] != self.version:
+                # Entries of older data versions are never asked for again
+                self.entries.clear()
+                self.version = key[0]
+            self.entries[key] = output
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def memoize(self, fn):
+        """
+        Decorator returning the cached output of fn for the same inputs and data
+        version, computing and caching it otherwise
+        """
+
+        # Qualified, as pages may define callbacks of the same name
+        name = f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args):
+            if not self.enabled:
+                return fn(*args)
+
+            key = self.key(name, args)
+            with self.lock:
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return self.entries[key]
+
+            output = self.read_disk(key) if self.disk_dir else MISSING
+            if output is not MISSING:
+                with self.lock:
+                    self.disk_hits += 1
+            else:
+                with self.lock:
+                    self.misses += 1
+                output = fn(*args)
+                if self.disk_dir:
+                    self.write_disk(key, output)
+            self.put(key, output)
+            return output
+
+        return wrapper
+
+
+cache = CallbackCache(
+    size=config.callback_cache_size,
+    disk_dir=(
+        os.path.join(dbh.DATA_DIR, "callback_cache")
+        if config.callback_cache_disk
+        else None
+    ),
+)
+memoize = cache.memoize
+store.on_reload(cache.prune_disk)
+
+
+@metrics.collector
+def cache_metrics():
+    stats = cache.stats()
+    lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+    return [
+        (
+            "fpl_callback_cache_requests_total",
+            "counter",
+            "Callback cache lookups by where the output was found",
+            [
+                ((("result", result),), stats[result])
+                for result in ("hits", "disk_hits", "misses")
+            ],
+        ),
+        (
+            "fpl_callback_cache_hit_ratio",
+            "gauge",
+            "Share of callback cache lookups answered from memory or disk",
+            [((), (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0)],
+        ),
+        (
+            "fpl_callback_cache_entries",
+            "gauge",
+            "Callback outputs held in this worker's memory",
+            [((), stats["entries"])],
+        ),
+    ]
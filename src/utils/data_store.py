@@ -0,0 +1,135 @@
+"""
+Process-wide store of the frames the pages read. Every frame is loaded once and
+served from memory to all pages and callbacks. When the database file changes
+they are all reloaded together and swapped in at once, so a rebuilt database
+shows up without restarting the app.
+"""
+import hashlib
+import os
+import threading
+
+from src.data_extraction import db_handler as dbh
+from src.data_extraction import snapshot
+from src.data_extraction.read_pool import ReadOnlyPool
+from src.utils import data_table_module as dtm
+from src.utils.filter_index import FilterIndex
+from src.utils.metrics import metrics
+from src.utils.player_series import PlayerSeries
+
+
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DataStore:
+    """
+    Loads the dashboard frames from db_name and reloads them when the file's
+    modification time or size changes and its content hash along with it
+    """
+
+    def __init__(self, db_name=dbh.DB_PATH):
+        self.db_name = db_name
+        self.pool = ReadOnlyPool(db_name)
+        self.lock = threading.Lock()
+        self.file_stat = None
+        self.file_hash = None
+        self.frames = None
+        self.reloads = 0
+        self.reload_callbacks = []
+
+    def on_reload(self, fn):
+        """
+        Registers fn to be called with the new content hash after each reload
+        """
+        self.reload_callbacks.append(fn)
+        return fn
+
+    def load_frames(self):
+        """
+        Reads every frame the pages use from the database and its snapshot
+        """
+
+        db = self.pool.handler()
+        players = dtm.load_players(db)
+        player_table = players.merge(
+            dtm.load_fixtures(db), how="inner", left_on="team_name", right_on="team"
+        )
+        player_table = snapshot.compact_frame(
+            dtm.format_name_by_availability(player_table)
+        )
+        frames = {
+            "current_gw": dtm.load_current_gw(db),
+            "player_table": player_table,
+            "player_table_orders": dtm.sort_orders(player_table),
+            "player_table_filter": FilterIndex(player_table),
+            "player_series": PlayerSeries(dtm.load_player_window_metrics(db)),
+            "player_leaderboards": dtm.load_player_leaderboards(db),
+            "positions": dtm.load_unique_values(
+                db, "positions_static", "singular_name_short"
+            ),
+            "teams": dtm.load_unique_values(db, "teams_static", "short_name"),
+            "player_names": sorted(
+                dtm.load_unique_values(db, "players_static", "web_name")
+            ),
+        }
+        return frames
+
+    def get(self):
+        """
+        Returns the dict of frames for the current database file, reloading them
+        first if the file changed since they were loaded. While the file cannot
+        be read or loaded the frames loaded last are served, and the reload is
+        tried again on the next call
+        """
+
+        try:
+            stat = os.stat(self.db_name)
+        except OSError:
+            if self.frames is None:
+                raise
+            return self.frames
+        file_stat = (stat.st_mtime_ns, stat.st_size)
+        if file_stat != self.file_stat:
+            with self.lock:
+                if file_stat != self.file_stat:
+                    try:
+                        self.reload(file_stat)
+                    except Exception as e:
+                        if self.frames is None:
+                            raise
+                        print(f"Keeping the loaded frames, reload failed: {e!r}")
+        return self.frames
+
+    def reload(self, file_stat):
+        """
+        Loads the frames again if the content of the file changed
+        """
+
+        # A touched but unchanged file keeps the loaded frames
+        digest = file_hash(self.db_name)
+        if digest != self.file_hash:
+            self.frames = self.load_frames()
+            self.file_hash = digest
+            self.reloads += 1
+            for fn in self.reload_callbacks:
+                fn(digest)
+        self.file_stat = file_stat
+
+
+store = DataStore()
+
+
+@metrics.collector
+def store_metrics():
+    return [
+        (
+            "fpl_data_store_reloads_total",
+            "counter",
+            "Loads of the dashboard frames after the database file changed",
+            [((), store.reloads)],
+        ),
+    ]
@@ -1,18 +1,55 @@
+import time
+
+import numpy as np
 import pandas as pd
 from src.data_extraction import db_handler as dbh
+from src.data_extraction import snapshot
+from src.utils.app_config import config
+from src.utils.metrics import metrics
 
 
-def load_fixtures(db):
-    query = """
-    SELECT t.short_name as team, f.event_number, f.fixture_difficulty, 
-    CASE WHEN is_home_team = 1 THEN opp.short_name||'(H)' ELSE opp.short_name||'(A)' END as opponent
-    FROM NEXT_FIVE_FIXTURES_BY_TEAM_VIEW f
-    JOIN TEAMS_STATIC opp
-    ON f.opponent_team = opp.id
-    JOIN TEAMS_STATIC t
-    on f.team_id = t.id
+def timed(view, fn, *args):
+    """
+    Returns fn(*args), timed as a load of view when metrics are enabled
     """
-    fixtures = pd.read_sql_query(query, db.conn)
+    if not metrics.enabled:
+        return fn(*args)
+    start = time.perf_counter()
+    result = fn(*args)
+    metrics.observe(
+        "fpl_frame_load_duration_seconds",
+        (("view", view),),
+        time.perf_counter() - start,
+    )
+    return result
+
+
+def load_frame(db, name):
+    """
+    Returns query `name` of snapshot.QUERIES
+    """
+    return timed(name, snapshot.load_frame, db.conn, db.db_name, name)
+
+
+def load_current_gw(db):
+    def current_gw():
+        db.cursor.execute("SELECT * FROM current_gw_view")
+        return db.cursor.fetchone()[0]
+
+    return timed("current_gw_view", current_gw)
+
+
+def load_unique_values(db, table_name, column_name):
+    return timed(
+        f"{table_name}.{column_name}",
+        db.get_unique_values_in_table_column,
+        table_name,
+        column_name,
+    )
+
+
+def load_fixtures(db):
+    fixtures = load_frame(db, "fixtures")
 
     fixtures_flat = pd.pivot(fixtures, index="team", columns="event_number")
     fixtures_flat.columns = fixtures_flat.columns.map(lambda x: f"{x[0]}_{x[1]}")
@@ -21,10 +58,78 @@ def load_fixtures(db):
 
 
 def load_players(db):
-    return pd.read_sql_query("SELECT * FROM PLAYER_TABULAR_VIEW", db.conn)
+    return load_frame(db, "players")
+
+
+def load_player_window_metrics(db):
+    return load_frame(db, "player_window_metrics")
+
+
+def load_player_leaderboards(db):
+    """
+    Returns a dict of each leaderboard metric's top players, ordered by value.
+    Metrics no player has a positive value of yet, such as the round points
+    before the round's first kickoff, get an empty frame
+    """
+    leaderboards = load_frame(db, "player_leaderboards")
+    empty = leaderboards.iloc[:0].drop(columns="metric")
+    by_metric = {
+        metric: leaderboard.drop(columns="metric").reset_index(drop=True)
+        for metric, leaderboard in leaderboards.groupby("metric", sort=False)
+    }
+    return {
+        metric: by_metric.get(metric, empty) for metric in config.leaderboard_metrics
+    }
+
+
+def sort_orders(df):
+    """
+    Returns the row positions of df sorted by each column, for both sort
+    directions, with missing values last either way
+    """
+    df = df.reset_index(drop=True)
+    return {
+        (column, direction): df[column]
+        .sort_values(ascending=direction == "asc", kind="stable", na_position="last")
+        .index.to_numpy()
+        for column in df.columns
+        for direction in ["asc", "desc"]
+    }
+
+
+def page_records(df, orders, mask, sort_by, page_current, page_size, columns):
+    """
+    Returns the given columns of one page of the rows of df selected by mask,
+    sorted by the DataTable sort_by, and the number of pages. Reads the order
+    from sort_orders, so only the rows of the page are ever sorted or copied
+    """
+    if sort_by:
+        order = orders[(sort_by[0]["column_id"], sort_by[0]["direction"])]
+    else:
+        order = np.arange(len(df))
+    if mask is not None:
+        order = order[mask[order]]
+    page = order[page_current * page_size : (page_current + 1) * page_size]
+    page_count = max(-(-len(order) // page_size), 1)
+    return df.iloc[page][columns].to_dict("records"), page_count
+
+
+def columnar_data(df, mask, columns):
+    """
+    Returns the given columns of the rows of df selected by mask as a dict of
+    value lists, with missing values as None
+    """
+    rows = df.iloc[mask.nonzero()[0]]
+    return {
+        column: rows[column].to_numpy(dtype=object, na_value=None).tolist()
+        for column in columns
+    }
 
 
 def format_name_by_availability(df):
+    # The snapshot stores names shared by many players as a categorical, which
+    # takes no new values
+    df["web_name"] = df["web_name"].astype(object)
     df.loc[
         (df["chance_of_playing_this_round"] < 100)
         & (df["chance_of_playing_this_round"] >= 75),
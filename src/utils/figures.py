@@ -0,0 +1,92 @@
+"""
+Figure builders that assemble traces straight from arrays, rather than through
+plotly express, so building a figure costs only the points it shows.
+"""
+import numpy as np
+import plotly.graph_objects as go
+from plotly.colors import qualitative
+
+# Largest marker diameter in pixels, as in plotly express
+SIZE_MAX = 20
+
+
+def player_scatter(df, x, y, size=None, labels=None, title=None):
+    """
+    Scatter of the players in df with one color per player, marker areas
+    proportional to the size column and the player's name, team and position
+    in the hover label
+    """
+    labels = labels or {}
+    palette = np.array(qualitative.Plotly)
+    marker = {"color": palette[np.arange(len(df)) % len(palette)]}
+    hover = [
+        "%{customdata[0]}",
+        "Team=%{customdata[1]}",
+        "Position=%{customdata[2]}",
+        f"{labels.get(x, x)}=%{{x}}",
+        f"{labels.get(y, y)}=%{{y}}",
+    ]
+    if size:
+        sizes = df[size].to_numpy()
+        marker.update(
+            size=sizes,
+            sizemode="area",
+            sizeref=max(np.nanmax(sizes, initial=0), 1e-9) / SIZE_MAX**2,
+        )
+        hover.append(f"{labels.get(size, size)}=%{{marker.size}}")
+
+    fig = go.Figure(
+        go.Scattergl(
+            x=df[x].to_numpy(),
+            y=df[y].to_numpy(),
+            mode="markers",
+            marker=marker,
+            customdata=df[["web_name", "team_name", "position"]].to_numpy(),
+            hovertemplate="<br>".join(hover) + "<extra></extra>",
+        )
+    )
+    fig.update_layout(
+        title=title,
+        xaxis_title=labels.get(x, x),
+        yaxis_title=labels.get(y, y),
+        showlegend=False,
+    )
+    return fig
+
+
+def player_lines(series, slots, metric, labels=None, title=None):
+    """
+    Line of metric by round for each player slot of a PlayerSeries, with the
+    player's name, team and position in the hover label
+    """
+    labels = labels or {}
+    hover = "<br>".join(
+        [
+            "%{customdata[0]}",
+            "Team=%{customdata[1]}",
+            "Position=%{customdata[2]}",
+            f"{labels.get('round', 'round')}=%{{x}}",
+            f"{labels.get(metric, metric)}=%{{y}}",
+        ]
+    )
+    traces = []
+    for slot in slots:
+        rounds = series.series(slot, "round")
+        player = [series.web_name[slot], series.team_name[slot], series.position[slot]]
+        traces.append(
+            go.Scatter(
+                x=rounds,
+                y=series.series(slot, metric),
+                mode="lines+markers",
+                name=series.web_name[slot],
+                customdata=[player] * len(rounds),
+                hovertemplate=hover + "<extra></extra>",
+            )
+        )
+    fig = go.Figure(traces)
+    fig.update_layout(
+        title=title,
+        xaxis_title=labels.get("round", "round"),
+        yaxis_title=labels.get(metric, metric),
+    )
+    return fig
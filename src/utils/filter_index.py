@@ -0,0 +1,96 @@
+"""
+Index over the players table for the Player Overall Statistics filters. It is
+built once per data load, so a filter change does not copy or scan the whole
+frame for every predicate.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class FilterIndex:
+    """
+    Row masks for every value of the categorical columns and sorted arrays of
+    the range columns of df. Selections are cached by their filter values, so
+    callbacks fired by the same change share one result
+    """
+
+    def __init__(
+        self,
+        df,
+        categorical_columns=("position", "team_name"),
+        range_columns=("minutes", "now_cost"),
+        cache_size=32,
+    ):
+        self.n_rows = len(df)
+        self.bitsets = {}
+        for column in categorical_columns:
+            codes, values = df[column].factorize()
+            self.bitsets[column] = {
+                value: codes == code for code, value in enumerate(values)
+            }
+        self.sorted_values = {}
+        self.orders = {}
+        for column in range_columns:
+            values = df[column].to_numpy(dtype=float)
+            order = np.argsort(values, kind="stable")
+            self.orders[column] = order
+            self.sorted_values[column] = values[order]
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+
+    def in_range(self, column, low, high):
+        """
+        Mask of the rows with low <= column <= high
+        """
+        sorted_values = self.sorted_values[column]
+        start = np.searchsorted(sorted_values, low, side="left")
+        end = np.searchsorted(sorted_values, high, side="right")
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[self.orders[column][start:end]] = True
+        return mask
+
+    def in_values(self, column, values):
+        """
+        Mask of the rows whose column is any of values
+        """
+        mask = np.zeros(self.n_rows, dtype=bool)
+        for value in values:
+            if value in self.bitsets[column]:
+                mask |= self.bitsets[column][value]
+        return mask
+
+    def select(self, position=None, teams=None, minutes=None, price=None):
+        """
+        Returns the read-only mask of the rows matching the filters, where None
+        or an empty list of teams matches every row
+        """
+        key = (
+            position,
+            tuple(teams or ()),
+            tuple(minutes) if minutes is not None else None,
+            tuple(price) if price is not None else None,
+        )
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                return self.cache[key]
+
+        mask = np.ones(self.n_rows, dtype=bool)
+        if minutes is not None:
+            mask &= self.in_range("minutes", *minutes)
+        if price is not None:
+            mask &= self.in_range("now_cost", *price)
+        if position is not None:
+            mask &= self.in_values("position", [position])
+        if teams:
+            mask &= self.in_values("team_name", teams)
+        mask.setflags(write=False)
+
+        with self.lock:
+            self.cache[key] = mask
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return mask
@@ -0,0 +1,194 @@
+"""
+Prometheus text-format metrics of the dashboard, served at /metrics when
+metrics_enabled is set in utils/config.yml. Covers the latency of every
+callback request and the size of each of its outputs, the time to load each
+frame and value of the data store from the snapshot or SQLite, the reloads of
+the data and the hits of the callback cache.
+
+Each gunicorn worker keeps its own metrics, and answers a scrape with them.
+While disabled nothing is hooked into the server, and the instrumented code
+only checks a flag.
+"""
+import bisect
+import json
+import threading
+import time
+
+import flask
+
+# Upper bounds of the histogram buckets, as in the Prometheus client libraries
+DURATION_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+BYTES_BUCKETS = [2**i for i in range(8, 24, 2)]
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def output_sizes(output, response):
+    """
+    Bytes of the JSON of each output in the response to a Dash callback request
+    for output, by component id and property. The response to a single output
+    counts as its size, envelope included, since parsing it would cost about
+    as much as the callbacks the cache answers
+    """
+    if response.status_code != 200:
+        return []
+    if not output.startswith(".."):
+        return [(output, response.calculate_content_length() or 0)]
+    try:
+        outputs = json.loads(response.get_data())["response"]
+    except (ValueError, KeyError, TypeError):
+        return []
+    return [
+        (f"{component}.{prop}", len(json.dumps(value, separators=(",", ":"))))
+        for component, props in outputs.items()
+        for prop, value in props.items()
+    ]
+
+
+class Histogram:
+    """
+    Cumulative bucket counts, sum and count of the values observed for each set
+    of labels
+    """
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series.setdefault(labels, [[0] * len(self.buckets), 0.0, 0])
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for labels, (counts, total, count) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                bucket_labels = format_labels(labels + (("le", bound),))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            inf_labels = format_labels(labels + (("le", "+Inf"),))
+            lines.append(f"{self.name}_bucket{inf_labels} {count}")
+            lines.append(f"{self.name}_sum{format_labels(labels)} {total}")
+            lines.append(f"{self.name}_count{format_labels(labels)} {count}")
+        return lines
+
+
+class Metrics:
+    """
+    Histograms filled by the instrumented code, and collectors called on every
+    scrape for values kept elsewhere, such as cache counters
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.collectors = []
+
+    def histogram(self, name, help_text, buckets=DURATION_BUCKETS):
+        return self.histograms.setdefault(name, Histogram(name, help_text, buckets))
+
+    def observe(self, name, labels, value):
+        """
+        Adds value to the histogram name for labels, a tuple of (label, value)
+        pairs
+        """
+        with self.lock:
+            self.histograms[name].observe(labels, value)
+
+    def collector(self, fn):
+        """
+        Registers fn, which returns (name, type, help, [(labels, value), ...])
+        tuples, to be called on every scrape
+        """
+        self.collectors.append(fn)
+        return fn
+
+    def render(self):
+        """
+        Every metric in the Prometheus text exposition format
+        """
+        with self.lock:
+            lines = [line for h in self.histograms.values() for line in h.render()]
+        for collect in self.collectors:
+            for name, metric_type, help_text, samples in collect():
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+                lines += [
+                    f"{name}{format_labels(labels)} {value}"
+                    for labels, value in samples
+                ]
+        return "\n".join(lines) + "\n"
+
+    def instrument(self, app):
+        """
+        Times the callback requests of the Dash app and serves /metrics
+        """
+        self.enabled = True
+        server = app.server
+
+        @server.before_request
+        def start_timer():
+            flask.g.metrics_start = time.perf_counter()
+
+        @server.after_request
+        def observe_callback(response):
+            if flask.request.endpoint != "/_dash-update-component":
+                return response
+            elapsed = time.perf_counter() - flask.g.metrics_start
+            output = (flask.request.get_json(silent=True) or {}).get("output")
+            callback = app.callback_map.get(output, {}).get("callback")
+            name = getattr(callback, "__name__", output)
+            self.observe(
+                "dash_callback_duration_seconds",
+                (("callback", name), ("status", response.status_code)),
+                elapsed,
+            )
+            for output_id, size in output_sizes(output or "", response):
+                self.observe(
+                    "dash_callback_output_bytes",
+                    (("callback", name), ("output", output_id)),
+                    size,
+                )
+            return response
+
+        @server.route("/metrics")
+        def serve_metrics():
+            return flask.Response(
+                self.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+            )
+
+
+metrics = Metrics()
+metrics.histogram(
+    "dash_callback_duration_seconds", "Time to answer a Dash callback request"
+)
+metrics.histogram(
+    "dash_callback_output_bytes",
+    "Size of the JSON of each output of a Dash callback",
+    BYTES_BUCKETS,
+)
+metrics.histogram(
+    "fpl_frame_load_duration_seconds",
+    "Time to load a page frame or value from the snapshot or SQLite, by the "
+    "view or table column it is read from",
+)
@@ -0,0 +1,78 @@
+"""
+Gameweek series of every player, grouped for the Player GW Statistics page.
+The rows of each player are contiguous in player_window_metrics, so a player's
+series is a slice of its columns, and selecting players never scans the rows
+of the rest of the league.
+"""
+import numpy as np
+
+
+class PlayerSeries:
+    """
+    Slices of df, ordered by player, round and fixture, for every player id,
+    with each player's name, team and position
+    """
+
+    def __init__(self, df):
+        order = np.lexsort((df["fixture"], df["round"], df["id"]))
+        if not np.array_equal(order, np.arange(len(df))):
+            df = df.iloc[order]
+        self.df = df
+        self.ids, starts = np.unique(self.df["id"].to_numpy(), return_index=True)
+        self.bounds = np.append(starts, len(self.df))
+        self.slots = {player_id: slot for slot, player_id in enumerate(self.ids)}
+        self.web_name = self.df["web_name"].to_numpy()[starts]
+        self.team_name = self.df["team_name"].to_numpy()[starts]
+        self.position = self.df["position"].to_numpy()[starts]
+        self.slots_by_name = {}
+        for slot, name in enumerate(self.web_name):
+            self.slots_by_name.setdefault(name, []).append(slot)
+        self.rankings = {}
+
+    def series(self, slot, column):
+        """
+        Returns the values of column for the player in slot, one per fixture
+        """
+        return self.df[column].to_numpy()[self.bounds[slot] : self.bounds[slot + 1]]
+
+    def mask(self, positions=None, teams=None):
+        """
+        Mask of the players in any of positions and teams, where None or an
+        empty list matches every player
+        """
+        mask = np.ones(len(self.ids), dtype=bool)
+        if positions:
+            mask &= np.isin(self.position, positions)
+        if teams:
+            mask &= np.isin(self.team_name, teams)
+        return mask
+
+    def named(self, names, mask):
+        """
+        Slots of the players called any of names among those in mask
+        """
+        slots = [slot for name in names for slot in self.slots_by_name.get(name, [])]
+        return [slot for slot in sorted(slots) if mask[slot]]
+
+    def ranking(self, metric):
+        """
+        Slots ordered by each player's latest round, then by their value of
+        metric in that round, highest first. Built on first use for each metric
+        """
+        if metric not in self.rankings:
+            rounds = self.df["round"].to_numpy()
+            ends = self.bounds[1:] - 1
+            latest_round = rounds[ends]
+            in_latest = rounds == np.repeat(latest_round, np.diff(self.bounds))
+            values = self.df[metric].to_numpy(dtype=float, na_value=np.nan)
+            values = np.where(in_latest & ~np.isnan(values), values, -np.inf)
+            latest_value = np.maximum.reduceat(values, self.bounds[:-1])
+            self.rankings[metric] = np.lexsort((-latest_value, -latest_round))
+        return self.rankings[metric]
+
+    def top(self, metric, mask, n=10):
+        """
+        Slots of the top n players in mask by ranking(metric)
+        """
+        ranking = self.ranking(metric)
+        return ranking[mask[ranking]][:n].tolist()